@@ -0,0 +1,222 @@
+import argparse
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import simpy
+
+from main import run_simulation
+from simulation.config import SimulationConfig
+from simulation.executor import RunExecutor
+from simulation.metrics import MetricsCollector
+from simulation.network import Network
+from simulation.traffic import TrafficProfileGenerator
+
+
+class CountingEnvironment(simpy.Environment):
+    """Environnement SimPy comptant les événements traités"""
+    
+    def __init__(self, initial_time=0):
+        super().__init__(initial_time)
+        self.event_count = 0
+    
+    def step(self):
+        self.event_count += 1
+        super().step()
+
+
+def make_config(**overrides):
+    """Configuration réduite pour les benchmarks (paramètres du run surchargés par overrides)"""
+    config = SimulationConfig()
+    config.N_eNB = 3
+    config.N_UE = 300
+    config.T_warmup = 10
+    config.T_sim = 60
+    for name, value in overrides.items():
+        setattr(config, name, value)
+    config.initialize()
+    return config
+
+
+def build_network(config, env=None):
+    """Construit l'environnement, le réseau et les UEs d'un run (sans l'exécuter)"""
+    env = env or CountingEnvironment()
+    rng = config.make_rng()
+    network = Network(env, config, MetricsCollector(config), rng)
+    profiles = TrafficProfileGenerator(config, rng).generate_profiles()
+    network.create_ues(profiles)
+    return env, network
+
+
+def bench_create_ues(n_ue=20000, n_enb=19):
+    """Temps de mise en place : tirage de la topologie et création des UEs"""
+    config = make_config(N_UE=n_ue, N_eNB=n_enb)
+    start = time.perf_counter()
+    build_network(config)
+    elapsed = time.perf_counter() - start
+    return {"n_ue": n_ue, "wall_s": elapsed, "ues_per_s": n_ue / elapsed}
+
+
+def bench_scheduling(scheduler_algo, ues_per_cell=50, n_ttis=5000):
+    """Débit du processus d'ordonnancement (TTIs/s) sur une cellule chargée, buffers pleins au départ"""
+    # Chauffe au-delà de l'horizon : seul l'ordonnancement s'exécute
+    config = make_config(N_UE=ues_per_cell, N_eNB=1, T_warmup=1e9, scheduler_algo=scheduler_algo,
+                         scheduling_mode="tick")
+    env, network = build_network(config)
+    enb = network.enbs[0]
+    
+    for ue in map(network.get_ue, range(config.N_UE)):
+        enb.allocate_rnti(ue)
+        ue.update_state("CONNECTED")
+        for _ in range(config.B_size):
+            ue.add_ul_packet(800)
+            enb.add_dl_packet(ue.id, 1500)
+    
+    start = time.perf_counter()
+    env.run(until=n_ttis * config.dt_local)
+    elapsed = time.perf_counter() - start
+    return {"scheduler": scheduler_algo, "ues": ues_per_cell, "ttis": n_ttis, "wall_s": elapsed,
+            "ttis_per_s": n_ttis / elapsed, "events": env.event_count, "events_per_s": env.event_count / elapsed}
+
+
+def bench_dl_traffic(ues_per_cell=20000, n_cycles=200):
+    """Coût d'un cycle de génération DL d'une cellule (tirages vectorisés et mise en buffer)"""
+    # Sans ECM : pas de paging, le cycle ne fait que tirer et enfiler les paquets
+    config = make_config(N_UE=ues_per_cell, N_eNB=1, T_warmup=0, ecm_enabled=False)
+    env, network = build_network(config)
+    enb = network.enbs[0]
+    cycle = enb.generate_dl_traffic()
+    
+    # Seul le cycle est chronométré ; les buffers sont vidés entre deux cycles pour ne mesurer que
+    # la mise en buffer (sans vidage, ils saturent après B_size cycles et les paquets sont perdus)
+    elapsed = 0.0
+    packets = 0
+    for _ in range(n_cycles):
+        start = time.perf_counter()
+        next(cycle)
+        elapsed += time.perf_counter() - start
+        packets += sum(len(buffer) for buffer in enb.dl_buffers.values()) + network.metrics.dl_packets_dropped
+        enb.dl_buffers.clear()
+        network.metrics.dl_packets_dropped = 0
+    return {"ues": ues_per_cell, "cycles": n_cycles, "wall_s": elapsed, "cycle_ms": 1000 * elapsed / n_cycles,
+            "packets_per_s": packets / elapsed}
+
+
+def bench_metrics_memory(n_records=1000000):
+    """Croissance mémoire du collecteur de métriques selon le nombre de latences enregistrées"""
+    results = {}
+    for latency_stats in ("streaming", "samples"):
+        config = make_config(N_UE=100000, latency_stats=latency_stats)
+        tracemalloc.start()
+        metrics = MetricsCollector(config)
+        initial, _ = tracemalloc.get_traced_memory()
+        
+        for i in range(n_records):
+            metrics.record_ul_latency(0.001 + (i % 1000) * 1e-5, i % config.N_eNB)
+        final, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        
+        results[latency_stats] = {"initial_bytes": initial, "final_bytes": final, "peak_bytes": peak,
+                                  "bytes_per_record": (final - initial) / n_records}
+    return {"records": n_records, **results}
+
+
+def bench_full_run(**overrides):
+    """Run complet de bout en bout à échelle réduite"""
+    config = make_config(**overrides)
+    env = CountingEnvironment()
+    start = time.perf_counter()
+    run_simulation(config, env)
+    elapsed = time.perf_counter() - start
+    return {"config": overrides, "wall_s": elapsed, "events": env.event_count,
+            "events_per_s": env.event_count / elapsed}
+
+
+# Benchmarks disponibles : nom -> (fonction, paramètres)
+BENCHMARKS = {
+    "create_ues": (bench_create_ues, {}),
+    "scheduling_rr": (bench_scheduling, {"scheduler_algo": "RR"}),
+    "scheduling_pf": (bench_scheduling, {"scheduler_algo": "PF"}),
+    "dl_traffic_cycle": (bench_dl_traffic, {}),
+    "metrics_memory": (bench_metrics_memory, {}),
+    "full_run_rr": (bench_full_run, {"N_UE": 60, "N_eNB": 3, "T_sim": 120, "scheduler_algo": "RR"}),
+    "full_run_pf": (bench_full_run, {"N_UE": 60, "N_eNB": 3, "T_sim": 120, "scheduler_algo": "PF"}),
+    "full_run_no_ecm": (bench_full_run, {"N_UE": 60, "N_eNB": 3, "T_sim": 120, "ecm_enabled": False}),
+}
+
+
+def run_benchmark(name):
+    """Exécute un benchmark (dans un processus dédié) et y ajoute le pic de mémoire résidente"""
+    function, params = BENCHMARKS[name]
+    result = function(**params)
+    result["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # ru_maxrss en Ko (Linux)
+    return result
+
+
+def git_commit():
+    """Retourne le commit courant (None hors dépôt git)"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(names):
+    """Exécute les benchmarks un par un, chacun dans un processus neuf (mesures de mémoire isolées)"""
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "benchmarks": {}
+    }
+    
+    executor = RunExecutor(run_benchmark, max_workers=1, max_retries=0)
+    for name, result, error in executor.run([(name, name) for name in names]):
+        if error is not None:
+            print(f"{name}: échec ({error!r})")
+            report["benchmarks"][name] = {"error": repr(error)}
+            continue
+        print(f"{name}: {result['wall_s']:.3f} s" if "wall_s" in result else f"{name}: ok")
+        report["benchmarks"][name] = result
+    
+    return report
+
+
+def compare(report, baseline):
+    """Affiche le rapport temps courant / référence de chaque benchmark commun"""
+    for name, result in report["benchmarks"].items():
+        reference = baseline["benchmarks"].get(name, {})
+        if "wall_s" in result and "wall_s" in reference:
+            ratio = result["wall_s"] / reference["wall_s"]
+            print(f"{name}: {reference['wall_s']:.3f} s -> {result['wall_s']:.3f} s (x{ratio:.2f})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de la simulation")
+    parser.add_argument("names", nargs="*", help="benchmarks à exécuter (tous par défaut)")
+    parser.add_argument("-o", "--output", default="benchmark_results.json", help="fichier JSON des résultats")
+    parser.add_argument("--compare", help="fichier JSON de référence (ex. commit précédent)")
+    args = parser.parse_args(argv)
+    
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"benchmarks inconnus : {', '.join(sorted(unknown))}")
+    
+    report = run_suite(args.names or list(BENCHMARKS))
+    
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,5 @@
+import os
+import json
 import simpy
 import numpy as np
 import pandas as pd
@@ -8,19 +10,55 @@ from simulation.schedulers import RoundRobinScheduler, ProportionalFairScheduler
 from simulation.traffic import TrafficProfileGenerator
 from simulation.metrics import MetricsCollector
 from simulation.config import SimulationConfig
+from simulation.executor import RunExecutor, run_in_process
+from simulation.sharding import run_sharded_simulation
+from simulation.profiling import InstrumentedEnvironment, save_trace
+from simulation.branching import run_with_shared_warmup
+from simulation.storage import run_writer
+from simulation.cache import result_cache
+from simulation.replication import ReplicationController, run_replications, scalar_metrics, summarize_runs
 
-def run_simulation(config):
-    # Créer l'environnement de simulation à événements discrets
-    env = simpy.Environment()
+def run_simulation(config, env=None):
+    # Cache des résultats : un run déjà simulé avec la même empreinte (paramètres, graine, code) n'est pas recalculé
+    cache = result_cache(config) if env is None else None
+    if cache is None:
+        return simulate(config, env)
     
-    # Initialiser le collecteur de métriques
-    metrics = MetricsCollector(config)
+    key = config.config_hash()
+    results = cache.get(key)
+    if results is None:
+        results = simulate(config)
+        cache.put(key, results)
+    return results
+
+def simulate(config, env=None):
+    # Paramètres dépendants et générateur aléatoire propre au run
+    config.initialize()
+    
+    # Mode "sharded" : une cellule par processus, métriques fusionnées
+    if config.execution_mode == "sharded":
+        if config.results_store == "columnar":
+            return run_sharded_simulation(config, writer=run_writer(config)).write_results()
+        return run_sharded_simulation(config).get_results()
+    
+    rng = config.make_rng()
+    
+    # Créer l'environnement de simulation à événements discrets (sauf s'il est fourni, ex. instrumenté)
+    if env is None:
+        if config.instrumentation == "on":
+            env = InstrumentedEnvironment(config.instrumentation_sample_interval)
+        else:
+            env = simpy.Environment()
+    
+    # Initialiser le collecteur de métriques (mode "columnar" : run écrit sur disque au fil de l'eau)
+    writer = run_writer(config) if config.results_store == "columnar" else None
+    metrics = MetricsCollector(config, writer)
     
     # Créer le réseau avec les eNodeBs
-    network = Network(env, config, metrics)
+    network = Network(env, config, metrics, rng)
     
     # Générer les profils de trafic
-    traffic_generator = TrafficProfileGenerator(config)
+    traffic_generator = TrafficProfileGenerator(config, rng)
     profiles = traffic_generator.generate_profiles()
     
     # Créer et placer les UEs avec leurs profils de trafic
@@ -29,8 +67,39 @@ def run_simulation(config):
     # Lancer la simulation
     env.run(until=config.T_warmup + config.T_sim)
     
-    # Collecter et retourner les résultats
-    return metrics.get_results()
+    # Clôturer les métriques par UE (temps par état, énergie)
+    metrics.collect_final_ue_metrics(network)
+    
+    # Collecter et retourner les résultats (mode "columnar" : métriques scalaires et répertoire du run)
+    results = metrics.write_results() if writer is not None else metrics.get_results()
+    
+    # Trace d'instrumentation (événements et temps réel par processus et par eNB)
+    if isinstance(env, InstrumentedEnvironment):
+        results["instrumentation"] = env.trace()
+        if config.instrumentation_file is not None:
+            save_trace(results["instrumentation"], config.instrumentation_file)
+    
+    return results
+
+def make_run_config(scenario, run):
+    """Configure un run d'un scénario"""
+    config = SimulationConfig()
+    config.ecm_enabled = scenario["ecm_enabled"]
+    config.scheduler_algo = scenario["scheduler"]
+    config.random_seed = run  # Différentes graines aléatoires
+    config.run_name = f"{scenario['name']}/run_{run:03d}"
+    return config
+
+def execute_runs(tasks, base_config, skip=None, ready=None):
+    """Exécute les tâches [(clé, config)] selon le mode d'exécution et renvoie (clé, résultats, erreur) au fil de l'eau
+    (skip(clé) : tâches à abandonner si elles ne sont pas encore lancées ; ready(clé) : tâches à retenir en file)"""
+    if base_config.execution_mode == "sharded":
+        # Chaque run occupe déjà tous les cœurs (un processus par eNodeB) : runs successifs
+        return run_in_process(run_simulation, tasks, skip, ready)
+    if base_config.warmup_sharing == "fork":
+        # Une chauffe par graine et par mode ECM, dont les scénarios RR/PF dérivent par fork
+        return run_with_shared_warmup(tasks, skip=skip, ready=ready)
+    return RunExecutor(run_simulation).run(tasks, skip, ready)
 
 def main():
     # Définir les scénarios à simuler
@@ -40,28 +109,38 @@ def main():
         {"name": "B1", "ecm_enabled": False, "scheduler": "RR"},
         {"name": "B2", "ecm_enabled": False, "scheduler": "PF"}
     ]
+    scenario_by_name = {scenario["name"]: scenario for scenario in scenarios}
     
-    all_results = {}
+    base_config = SimulationConfig()
+    n_runs = base_config.N_runs
     
-    # Exécuter chaque scénario N_runs fois
-    for scenario in scenarios:
-        scenario_results = []
-        
-        for run in range(config.N_runs):
-            print(f"Running scenario {scenario['name']}, run {run+1}/{config.N_runs}")
-            
-            # Configurer la simulation pour ce scénario
-            config = SimulationConfig()
-            config.ecm_enabled = scenario["ecm_enabled"]
-            config.scheduler_algo = scenario["scheduler"]
-            config.random_seed = run  # Différentes graines aléatoires
-            
-            # Exécuter la simulation
-            results = run_simulation(config)
-            scenario_results.append(results)
+    def make_config(name, run):
+        return make_run_config(scenario_by_name[name], run)
+    
+    def execute(tasks, skip=None, ready=None):
+        return execute_runs(tasks, base_config, skip, ready)
+    
+    # Exécuter les runs en parallèle et récupérer les résultats au fil de l'eau
+    if base_config.replication_control == "sequential":
+        # Runs soumis au fil de l'eau : un scénario s'arrête dès que ses intervalles de confiance sont assez étroits
+        controllers = {name: ReplicationController(base_config) for name in scenario_by_name}
+        outcomes = run_replications(controllers, make_config, execute)
+    else:
+        # Les N_runs de chaque scénario
+        outcomes = execute([((name, run), make_config(name, run)) for name in scenario_by_name for run in range(n_runs)])
+    
+    scenario_results = {name: [] for name in scenario_by_name}
+    for (name, run), results, error in outcomes:
+        if error is not None:
+            print(f"Scenario {name}, run {run+1}/{n_runs} failed: {error!r}")
+            continue
         
-        # Agréger les résultats des N_runs
-        all_results[scenario["name"]] = aggregate_results(scenario_results)
+        print(f"Scenario {name}, run {run+1}/{n_runs} done")
+        scenario_results[name].append(results)
+    
+    # Agréger les résultats des runs
+    all_results = {name: aggregate_results(results, base_config.replication_confidence)
+                   for name, results in scenario_results.items()}
     
     # Générer les graphes de comparaison
     generate_comparison_graphs(all_results)
@@ -69,18 +148,25 @@ def main():
     # Sauvegarder les résultats
     save_results(all_results)
 
-def aggregate_results(scenario_results):
-    # Calculer les moyennes, écarts-types, etc.
-    # Pour chaque métrique sur les N_runs
-    pass
+def aggregate_results(scenario_results, confidence=0.95):
+    """Moyenne, écart-type et intervalle de confiance de chaque métrique scalaire sur les runs d'un scénario"""
+    runs = [scalar_metrics(results) for results in scenario_results]
+    names = sorted(set().union(*runs)) if runs else []
+    return {name: summarize_runs([run[name] for run in runs if name in run], confidence) for name in names}
 
 def generate_comparison_graphs(all_results):
     # Générer des graphiques comparant les différents scénarios
     pass
 
-def save_results(all_results):
-    # Sauvegarder les résultats dans des fichiers CSV/JSON
-    pass
+def save_results(all_results, results_dir="results"):
+    """Écrit les résultats agrégés par scénario (summary.json) et leur version tabulaire (summary.csv)"""
+    os.makedirs(results_dir, exist_ok=True)
+    with open(os.path.join(results_dir, "summary.json"), "w") as f:
+        json.dump(all_results, f, indent=2, default=float)
+    
+    rows = [{"scenario": name, "metric": metric, **summary}
+            for name, metrics in all_results.items() for metric, summary in metrics.items()]
+    pd.DataFrame(rows).to_csv(os.path.join(results_dir, "summary.csv"), index=False)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
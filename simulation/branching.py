@@ -0,0 +1,123 @@
+import functools
+import multiprocessing as mp
+import os
+import simpy
+from simulation.network import Network
+from simulation.traffic import TrafficProfileGenerator
+from simulation.metrics import MetricsCollector
+from simulation.executor import RunExecutor
+from simulation.storage import run_writer
+from simulation.cache import result_cache
+
+# Paramètres modifiables après la chauffe : les scénarios qui ne diffèrent que par ceux-ci la partagent
+BRANCHABLE_PARAMETERS = ("scheduler_algo", "w_PF", "scheduling_window", "run_name")
+
+
+def warm_up(config):
+    """Construit la topologie et les UEs puis simule la période de chauffe ; retourne (env, network, metrics)"""
+    config.initialize()
+    rng = config.make_rng()
+    
+    env = simpy.Environment()
+    metrics = MetricsCollector(config)
+    network = Network(env, config, metrics, rng)
+    profiles = TrafficProfileGenerator(config, rng).generate_profiles()
+    network.create_ues(profiles)
+    
+    env.run(until=config.T_warmup)
+    return env, network, metrics
+
+
+def run_branch(env, network, metrics, overrides):
+    """Poursuit une simulation chauffée avec les paramètres overrides (dans un processus fils)"""
+    unknown = set(overrides) - set(BRANCHABLE_PARAMETERS)
+    if unknown:
+        raise ValueError(f"Paramètres non dérivables après la chauffe : {', '.join(sorted(unknown))}")
+    
+    # La configuration est partagée par toutes les entités : un seul objet à modifier
+    for name, value in overrides.items():
+        setattr(network.config, name, value)
+    for enb in network.enbs:
+        enb.scheduler = enb.create_scheduler()
+    
+    # Stockage en colonnes propre à la branche (aucune série n'est échantillonnée pendant la chauffe)
+    if network.config.results_store == "columnar":
+        metrics.attach_writer(run_writer(network.config))
+    
+    env.run(until=network.config.T_warmup + network.config.T_sim)
+    
+    metrics.collect_final_ue_metrics(network)
+    results = metrics.write_results() if metrics.writer is not None else metrics.get_results()
+    
+    cache = result_cache(network.config)
+    if cache is not None:
+        cache.put(network.config.config_hash(), results)
+    return results
+
+
+def run_group(slots, skip, group):
+    """Simule la chauffe d'un groupe (config, branches) puis chaque branche [(clé, overrides)] dans un
+    processus fils créé par fork (copie à l'écriture de l'état chauffé, générateurs aléatoires compris) ;
+    chauffe et branches occupent chacune un emplacement de slots. Retourne [(clé, résultats, erreur)]"""
+    config, branches = group
+    
+    # Processus créé par fork au lancement du groupe : skip y voit l'état du parent à cet instant
+    if skip is not None:
+        branches = [(key, overrides) for key, overrides in branches if not skip(key)]
+    
+    with slots:
+        env, network, metrics = warm_up(config)
+    
+    executor = RunExecutor(functools.partial(run_branch, env, network, metrics), max_workers=len(branches),
+                           start_method="fork", slots=slots)
+    return list(executor.run(branches))
+
+
+def shared_warmup_key(config):
+    """Clé des paramètres non dérivables : les configurations de même clé peuvent partager leur chauffe"""
+    return repr(sorted((name, value) for name, value in vars(config).items()
+                       if name not in BRANCHABLE_PARAMETERS))
+
+
+def run_with_shared_warmup(tasks, max_workers=None, skip=None, ready=None):
+    """Exécute les tâches [(clé, config)] en ne simulant qu'une chauffe par groupe de configurations
+    ne différant que par des paramètres dérivables (mêmes nombres aléatoires pour tout le groupe) ;
+    skip(clé) et ready(clé) comme pour RunExecutor.run (un groupe n'est abandonné que si toutes ses branches
+    le sont, et n'est lancé que si toutes ses branches non abandonnées sont prêtes)"""
+    groups = {}
+    for key, config in tasks:
+        # Runs déjà en cache : ni chauffe ni branche
+        cache = result_cache(config)
+        results = cache.get(config.config_hash()) if cache is not None else None
+        if results is not None:
+            yield key, results, None
+            continue
+        
+        groups.setdefault(shared_warmup_key(config), []).append((key, config))
+    
+    if not groups:
+        return
+    
+    # Un processus par groupe, chauffes en parallèle ; les chauffes et toutes les branches se partagent
+    # max_workers emplacements. Les processus de groupe ne sont pas démons : ils lancent leurs branches
+    max_workers = max_workers or os.cpu_count()
+    slots = mp.get_context("fork").BoundedSemaphore(max_workers)
+    group_tasks = []
+    for group_key, group in groups.items():
+        branches = [(key, {name: getattr(config, name) for name in BRANCHABLE_PARAMETERS})
+                    for key, config in group]
+        group_tasks.append((group_key, (group[0][1], branches)))
+    
+    # Au plus max_workers groupes lancés : les suivants restent en file, où skip peut encore les abandonner
+    group_skip = (lambda group_key: all(skip(key) for key, _ in groups[group_key])) if skip is not None else None
+    group_ready = (lambda group_key: all(ready(key) or (skip is not None and skip(key))
+                                         for key, _ in groups[group_key])) if ready is not None else None
+    executor = RunExecutor(functools.partial(run_group, slots, skip), max_workers=max_workers, start_method="fork",
+                           daemon=False)
+    for group_key, branch_results, error in executor.run(group_tasks, skip=group_skip, ready=group_ready):
+        if error is not None:
+            # Chauffe en échec : toutes les branches du groupe le sont
+            for key, _ in groups[group_key]:
+                yield key, None, error
+            continue
+        yield from branch_results
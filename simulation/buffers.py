@@ -0,0 +1,74 @@
+from array import array
+
+
+class PacketQueue:
+    """File FIFO de paquets à capacité bornée : tampon circulaire de tailles et d'instants
+    de création, alloué au premier paquet puis agrandi par doublement jusqu'à la capacité"""
+    
+    __slots__ = ("capacity", "sizes", "created_at", "head", "count", "backlog_bits")
+    
+    INITIAL_CAPACITY = 4
+    
+    def __init__(self, capacity):
+        self.capacity = capacity  # Nombre maximal de paquets (B_size)
+        self.sizes = None         # Tailles des paquets (bits), allouées au premier paquet
+        self.created_at = None    # Instants de création des paquets
+        self.head = 0             # Position du paquet en tête de file
+        self.count = 0
+        self.backlog_bits = 0     # Somme des tailles des paquets en attente
+    
+    def __len__(self):
+        return self.count
+    
+    def __bool__(self):
+        return self.count > 0
+    
+    def is_full(self):
+        """Indique si la file a atteint sa capacité"""
+        return self.count >= self.capacity
+    
+    def grow(self):
+        """Double la taille du tampon (bornée par la capacité) en remettant la tête en position 0"""
+        size = len(self.sizes) if self.sizes is not None else 0
+        new_size = min(self.capacity, max(self.INITIAL_CAPACITY, 2 * size))
+        sizes = array("q", bytes(8 * new_size))
+        created_at = array("d", bytes(8 * new_size))
+        
+        for i in range(self.count):
+            j = (self.head + i) % size
+            sizes[i] = self.sizes[j]
+            created_at[i] = self.created_at[j]
+        
+        self.sizes = sizes
+        self.created_at = created_at
+        self.head = 0
+    
+    def push(self, size, created_at):
+        """Enfile un paquet ; retourne False si la file est pleine"""
+        if self.count >= self.capacity:
+            return False
+        if self.sizes is None or self.count == len(self.sizes):
+            self.grow()
+        
+        tail = (self.head + self.count) % len(self.sizes)
+        self.sizes[tail] = size
+        self.created_at[tail] = created_at
+        self.count += 1
+        self.backlog_bits += size
+        return True
+    
+    def head_size(self):
+        """Retourne la taille du paquet en tête de file (file non vide)"""
+        return self.sizes[self.head]
+    
+    def pop(self):
+        """Défile le paquet en tête et retourne (taille, instant de création)"""
+        if self.count == 0:
+            raise IndexError("pop sur une file de paquets vide")
+        
+        size = self.sizes[self.head]
+        created_at = self.created_at[self.head]
+        self.head = (self.head + 1) % len(self.sizes)
+        self.count -= 1
+        self.backlog_bits -= size
+        return size, created_at
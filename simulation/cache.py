@@ -0,0 +1,119 @@
+import functools
+import hashlib
+import os
+import pickle
+from simulation.storage import StoredRun
+
+# Sources dont dépendent les résultats d'un run : le paquet simulation et main.py (run_simulation)
+SOURCE_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+@functools.lru_cache(maxsize=None)
+def code_version():
+    """Empreinte du code de simulation (contenu des sources), calculée une fois par processus"""
+    digest = hashlib.sha256()
+    paths = [os.path.join(SOURCE_ROOT, name) for name in sorted(os.listdir(SOURCE_ROOT)) if name.endswith(".py")]
+    paths.append(os.path.join(os.path.dirname(SOURCE_ROOT), "main.py"))
+    
+    for path in paths:
+        if os.path.exists(path):
+            digest.update(os.path.basename(path).encode())
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def result_cache(config):
+    """Retourne le cache des résultats configuré, ou None (cache désactivé, ou run instrumenté :
+    sa trace de temps réel n'est pas reproductible)"""
+    if config.result_cache != "on" or config.instrumentation == "on":
+        return None
+    return ResultCache(config.result_cache_dir, config.result_cache_max_bytes)
+
+
+class ResultCache:
+    """Cache disque des résultats de runs adressé par contenu (empreinte de la configuration et du code),
+    borné en taille : les entrées les moins récemment utilisées sont évincées"""
+    
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+    
+    def path(self, key):
+        """Fichier d'une entrée (sous-répertoire par préfixe de l'empreinte)"""
+        return os.path.join(self.cache_dir, key[:2], f"{key}.pkl")
+    
+    def get(self, key):
+        """Retourne les résultats en cache pour key, ou None"""
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                results = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        
+        # Run stocké en colonnes : l'entrée ne vaut que si son répertoire contient encore ce run
+        # (un run de même nom mais d'une autre configuration a pu l'écraser)
+        if "results_path" in results:
+            try:
+                if StoredRun(results["results_path"]).config_hash != key:
+                    return None
+            except (OSError, ValueError, KeyError):
+                return None
+        
+        # Date de modification = dernière utilisation (éviction LRU)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return results
+    
+    def put(self, key, results):
+        """Stocke les résultats d'un run puis évince si la taille maximale est dépassée"""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        
+        # Écriture atomique : des workers concurrents peuvent produire la même entrée
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            pickle.dump(results, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+        
+        self.evict()
+    
+    def entries(self):
+        """Retourne [(date de dernière utilisation, taille, chemin)] des entrées du cache"""
+        entries = []
+        for directory, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".pkl"):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue  # Évincée entre-temps par un autre processus
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+    
+    def evict(self):
+        """Supprime les entrées les moins récemment utilisées jusqu'à repasser sous max_bytes"""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+    
+    def clear(self):
+        """Vide le cache"""
+        for _, _, path in self.entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
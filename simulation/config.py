@@ -1,4 +1,12 @@
+import hashlib
+import json
 import numpy as np
+from simulation.cache import code_version
+
+# Paramètres sans effet sur les résultats d'un run : exclus de son empreinte (cache des résultats)
+UNHASHED_PARAMETERS = ("N_runs", "N_runs_min", "replication_control", "replication_metrics", "replication_precision",
+                       "replication_confidence", "warmup_sharing", "run_name", "results_dir", "instrumentation_file",
+                       "result_cache", "result_cache_dir", "result_cache_max_bytes")
 
 class SimulationConfig:
     """Configuration des paramètres de simulation"""
@@ -25,7 +33,22 @@ class SimulationConfig:
             # Probabilité d'assignation des profils
             i: 1.0/self.K for i in range(self.K)
         }
+        # Table déclarative des profils : plages horaires [début, fin[ (niveau de base, gigue uniforme),
+        # la première plage correspondante l'emporte ; niveau par défaut hors plages
+        self.profile_table = {
+            0: {  # Travailleur bureau : actif aux heures de bureau, pause déjeuner, calme la nuit
+                "ranges": [(8, 12, 0.7, 0.2), (14, 18, 0.7, 0.2), (12, 14, 0.4, 0.3), (22, 6, 0.05, 0.1)],
+                "default": (0.2, 0.3)
+            },
+            1: {  # Utilisateur nocturne : actif le soir et la nuit, sommeil en matinée
+                "ranges": [(19, 2, 0.6, 0.3), (2, 8, 0.05, 0.1)],
+                "default": (0.2, 0.3)
+            }
+        }
+        self.profile_default_level = (0.3, 0.4)  # Profils absents de la table : activité moyenne
+        self.profile_table_file = None  # Fichier JSON remplaçant profile_table (même format)
         self.B_size = 100        # Taille des buffers (paquets)
+        self.traffic_mode = "hybrid"  # "process" (un processus par UE) ou "hybrid" (UEs en OFF réveillés par leur eNB)
         
         # RRM
         self.ecm_enabled = True  # Mode "Avec ECM" par défaut
@@ -33,24 +56,76 @@ class SimulationConfig:
         self.L_RRC_Setup = 0.1    # Délai Setup (s)
         self.L_RRC_Release = 0.05  # Délai Release (s)
         self.scheduler_algo = "RR"  # Algorithme d'ordonnancement
+        self.scheduling_mode = "event"  # "tick" (réveil à chaque TTI) ou "event" (réveil sur arrivée de données)
         self.N_RB = 100           # Nombre de Resource Blocks par TTI
+        self.scheduling_window = 1  # TTIs ordonnancés en un seul appel (1 : chaque TTI ; >1 : études de capacité)
         self.w_PF = 100           # Fenêtre pour Proportional Fair (TTI)
         
         # Canal
         self.R_RB = 477           # Débit par Resource Block (bits/TTI)
         
+        # Métriques
+        self.latency_stats = "streaming"  # "streaming" (mémoire bornée) ou "samples" (toutes les latences)
+        self.instrumentation = "off"  # "on" : événements et temps réel par processus et par eNB (mode "single")
+        self.instrumentation_sample_interval = 1.0  # Période d'échantillonnage de la file d'événements (s simulées)
+        self.instrumentation_file = None  # Fichier JSON de la trace d'instrumentation
+        
         # Énergie
         self.P_Idle = 5           # Puissance en IDLE (mW)
         self.P_Connected_Base = 100  # Puissance de base en CONNECTED (mW)
         self.P_Tx_Active = 150     # Surcoût en transmission (mW)
         self.P_Rx_Active = 80      # Surcoût en réception (mW)
+        self.energy_accounting = "interval"  # "interval" (intégrée aux changements d'état) ou "periodic" (chaque seconde)
+        
+        # Exécution
+        self.execution_mode = "single"  # "single" (un environnement SimPy) ou "sharded" (un processus par eNodeB)
+        self.warmup_sharing = "off"  # "fork" : chauffe simulée une fois, scénarios dérivés par fork (scheduler...)
+        
+        # Réplications
+        self.replication_control = "fixed"  # "sequential" : arrêt d'un scénario dès la précision atteinte (N_runs au plus)
+        self.N_runs_min = 3                 # Runs initiaux avant le premier test d'arrêt
+        self.replication_metrics = ("avg_energy", "rnti_failures", "ul_latency.percentile_99", "dl_latency.percentile_99")
+        self.replication_precision = 0.05   # Demi-largeur relative visée de l'intervalle de confiance
+        self.replication_confidence = 0.95  # Niveau de confiance
+        
+        # Stockage des résultats
+        self.results_store = "memory"  # "columnar" : chaque run écrit sur disque en colonnes, relu par np.memmap
+        self.results_dir = "results/runs"  # Un sous-répertoire par run (mode "columnar")
+        self.run_name = None  # Sous-répertoire du run (par défaut seed_<graine>)
+        
+        # Cache des résultats
+        self.result_cache = "off"  # "on" : runs terminés mis en cache sur disque, indexés par l'empreinte de la config
+        self.result_cache_dir = "results/cache"
+        self.result_cache_max_bytes = 2 * 1024 ** 3  # Au-delà : éviction des runs les moins récemment utilisés
         
         # Graine aléatoire
         self.random_seed = 42
         
     def initialize(self):
-        """Initialise les paramètres dépendants et la graine aléatoire"""
-        np.random.seed(self.random_seed)
-        
+        """Initialise les paramètres dépendants"""
         # Calculer le nombre d'intervalles globaux
-        self.N_intervals = int(24 * 3600 / self.dt_global)
\ No newline at end of file
+        self.N_intervals = int(24 * 3600 / self.dt_global)
+    
+    def config_hash(self):
+        """Empreinte canonique des paramètres qui influent sur un run et de la version du code :
+        deux configurations de même empreinte produisent les mêmes résultats"""
+        self.initialize()  # Paramètres dépendants inclus, que l'appelant ait initialisé ou non
+        excluded = set(UNHASHED_PARAMETERS)
+        if self.results_store == "columnar":
+            excluded -= {"run_name", "results_dir"}  # Le répertoire du run fait alors partie des résultats
+        parameters = {name: value for name, value in vars(self).items() if name not in excluded}
+        
+        # Le contenu du fichier de profils compte, pas seulement son nom
+        if self.profile_table_file is not None:
+            with open(self.profile_table_file, "rb") as f:
+                parameters["profile_table_file"] = hashlib.sha256(f.read()).hexdigest()
+        
+        canonical = json.dumps(parameters, sort_keys=True, default=repr)
+        return hashlib.sha256(f"{canonical}\n{code_version()}".encode()).hexdigest()
+    
+    def make_rng(self, stream=None):
+        """Crée le générateur aléatoire propre à un run (sans état global partagé),
+        ou son sous-flux indépendant numéro stream (un par eNodeB en mode "sharded")"""
+        if stream is None:
+            return np.random.default_rng(self.random_seed)
+        return np.random.default_rng(np.random.SeedSequence(self.random_seed, spawn_key=(stream,)))
@@ -1,57 +1,117 @@
+import heapq
+import math
 import simpy
 import numpy as np
+from simulation.schedulers import RoundRobinScheduler, ProportionalFairScheduler
+from simulation.buffers import PacketQueue
+from simulation.population import PopulationField, STATE_NAMES, STATE_CODES, STATE_IDLE, NO_RNTI, NO_ENB
+
+# Priorité SimPy des fins de TTI : après les événements ordinaires (NORMAL = 1)
+# du même instant, puis par identifiant d'eNB
+TTI_PRIORITY = 2
+
+
+class TTIEvent(simpy.Event):
+    """Fin de TTI ordonnancée après tous les autres événements du même instant"""
+    
+    def __init__(self, env, delay, priority):
+        super().__init__(env)
+        self._ok = True
+        self._value = None
+        env.schedule(self, priority, delay)
+
 
 class UE:
-    """Représentation d'un User Equipment"""
+    """Représentation d'un User Equipment (vue sur une ligne de UEPopulation). L'état persistant est dans
+    la population : un UE sans activité en cours peut être détruit puis recréé (Network.get_ue)"""
+    
+    __slots__ = ("id", "env", "network", "population", "profile", "config",
+                 "ul_buffer", "traffic_process", "inactivity_timer", "rrc_setup", "__weakref__")
+    
+    # Attributs stockés dans les tableaux de la population
+    energy_consumed = PopulationField("energy_consumed")
+    time_in_idle = PopulationField("time_in_idle")
+    time_in_connected = PopulationField("time_in_connected")
+    last_state_change = PopulationField("last_state_change")
+    last_activity = PopulationField("last_activity")
+    packets_sent = PopulationField("packets_sent")
+    packets_received = PopulationField("packets_received")
+    packets_dropped = PopulationField("packets_dropped")
     
     def __init__(self, ue_id, env, network, profile, position, config):
         self.id = ue_id
         self.env = env
         self.network = network
+        self.population = network.population
         self.profile = profile
-        self.position = position
         self.config = config
-        self.serving_enb = None
-        
-        # État ECM (IDLE au départ)
-        self.state = "IDLE" if config.ecm_enabled else "CONNECTED"
-        self.rnti = None  # Attribué par l'eNB
+        self.inactivity_timer = None
+        self.rrc_setup = None  # Procédure RRC Setup en cours (une seule à la fois)
+        self.traffic_process = None
         
-        # Buffers de paquets
-        self.ul_buffer = []
+        # Position (None : déjà placée par Network.place_ues) ; profil, état ECM (IDLE au départ)
+        # et RNTI sont initialisés par la population
+        if position is not None:
+            self.position = position
         
-        # Métriques
-        self.energy_consumed = 0
-        self.time_in_idle = 0
-        self.time_in_connected = 0
-        self.last_state_change = env.now
-        self.packets_sent = 0
-        self.packets_received = 0
-        self.packets_dropped = 0
-        
-        # Processus de consommation d'énergie
-        self.env.process(self.energy_consumption_process())
-        
-        # Rattachement initial à un eNB
-        self.attach_to_nearest_enb()
+        # Buffer UL (non vide : l'UE est retenu par Network.pinned_ues)
+        self.ul_buffer = PacketQueue(config.B_size)
+    
+    def start(self):
+        """Démarre les processus propres à l'UE (UEs créés dès le lancement) ; en mode "hybrid",
+        le premier réveil est fait en bloc par Network.first_wakeup"""
+        # Processus de consommation d'énergie (sinon intégrée aux changements d'état)
+        if self.config.energy_accounting == "periodic":
+            self.env.process(self.energy_consumption_process())
         
-        # Démarrer le processus de génération de trafic
-        self.traffic_process = env.process(self.generate_traffic())
+        # Rattachement initial à un eNB (sauf si déjà calculé en bloc)
+        if self.serving_enb is None:
+            self.attach_to_nearest_enb()
         
+        # Génération de trafic : processus propre à l'UE, ou réveils planifiés par l'eNB (mode "hybrid")
+        if self.config.traffic_mode != "hybrid":
+            self.traffic_process = self.env.process(self.generate_traffic())
+    
+    @property
+    def position(self):
+        return tuple(self.population.position[self.id].tolist())
+    
+    @position.setter
+    def position(self, position):
+        self.population.position[self.id] = position
+    
+    @property
+    def state(self):
+        return STATE_NAMES[self.population.state[self.id]]
+    
+    @state.setter
+    def state(self, state):
+        self.population.state[self.id] = STATE_CODES[state]
+    
+    @property
+    def rnti(self):
+        rnti = self.population.rnti[self.id].item()
+        return None if rnti == NO_RNTI else rnti
+    
+    @rnti.setter
+    def rnti(self, rnti):
+        self.population.rnti[self.id] = NO_RNTI if rnti is None else rnti
+    
+    @property
+    def serving_enb(self):
+        enb_id = self.population.serving_enb[self.id]
+        return None if enb_id == NO_ENB else self.network.enb_by_id[enb_id]
+    
+    @serving_enb.setter
+    def serving_enb(self, enb):
+        self.population.serving_enb[self.id] = NO_ENB if enb is None else enb.id
+    
     def attach_to_nearest_enb(self):
         """Attache l'UE à l'eNB le plus proche"""
-        nearest_enb = None
-        min_distance = float('inf')
+        nearest = self.network.nearest_enbs(self.population.position[self.id:self.id + 1])[0]
         
-        for enb in self.network.enbs:
-            distance = np.sqrt((self.position[0] - enb.position[0])**2 + 
-                              (self.position[1] - enb.position[1])**2)
-            if distance < min_distance:
-                min_distance = distance
-                nearest_enb = enb
-        
-        self.serving_enb = nearest_enb
-        self.serving_enb.register_ue(self)
+        self.serving_enb = self.network.enbs[nearest]
+        self.serving_enb.register_ue(self.id)
     
     def generate_traffic(self):
         """Génère du trafic selon le profil de l'UE"""
@@ -60,57 +120,77 @@ class UE:
             yield self.env.timeout(self.config.T_warmup - self.env.now)
         
         while True:
-            # Déterminer l'intervalle global actuel
-            current_interval = int((self.env.now - self.config.T_warmup) / self.config.dt_global) % self.config.N_intervals
-            
-            # Déterminer la durée de la période ON
-            activity_level = self.profile.get_activity_level(current_interval)
-            on_duration = self.profile.get_on_duration(activity_level)
-            
-            # Période active (ON)
-            if on_duration > 0:
-                # Déclencher la transition vers CONNECTED si nécessaire
-                if self.state == "IDLE":
-                    yield self.env.process(self.transition_to_connected())
-                
-                # Génération de paquets pendant la période ON
-                end_time = self.env.now + on_duration
-                while self.env.now < end_time:
-                    # Générer un paquet UL
-                    packet_size = self.profile.get_ul_packet_size(activity_level)
-                    self.add_ul_packet(packet_size)
-                    
-                    # Temps avant le prochain paquet
-                    inter_arrival = self.profile.get_ul_inter_arrival(activity_level)
-                    yield self.env.timeout(inter_arrival)
+            off_duration = yield from self.on_period()
             
             # Période inactive (OFF)
-            off_duration = self.profile.get_off_duration(activity_level)
             yield self.env.timeout(off_duration)
     
+    def on_period(self):
+        """Période active (ON) : connexion puis paquets UL ; retourne la durée de la période OFF suivante"""
+        # Déterminer l'intervalle global actuel
+        current_interval = int((self.env.now - self.config.T_warmup) / self.config.dt_global) % self.config.N_intervals
+        
+        # Déterminer la durée de la période ON
+        activity_level = self.profile.get_activity_level(current_interval)
+        on_duration = self.profile.get_on_duration(activity_level)
+        
+        # Période active (ON)
+        if on_duration > 0:
+            # Déclencher la transition vers CONNECTED si nécessaire
+            if self.state == "IDLE":
+                yield self.request_connection()
+            
+            # Génération de paquets pendant la période ON
+            end_time = self.env.now + on_duration
+            while self.env.now < end_time:
+                # Générer un paquet UL
+                packet_size = self.profile.get_ul_packet_size(activity_level)
+                self.add_ul_packet(packet_size)
+                
+                # Temps avant le prochain paquet
+                inter_arrival = self.profile.get_ul_inter_arrival(activity_level)
+                yield self.env.timeout(inter_arrival)
+        
+        return self.profile.get_off_duration(activity_level)
+    
+    def wake_up(self):
+        """Réveil planifié par l'eNB (mode "hybrid") : l'UE redevient un processus le temps de sa période ON"""
+        self.traffic_process = self.env.process(self.hybrid_on_period())
+    
+    def hybrid_on_period(self):
+        """Période ON puis remise en sommeil : le réveil suivant est confié à l'eNB"""
+        off_duration = yield from self.on_period()
+        self.traffic_process = None
+        self.serving_enb.schedule_wakeup(self, self.env.now + off_duration)
+    
     def add_ul_packet(self, size):
         """Ajoute un paquet dans le buffer UL"""
-        if len(self.ul_buffer) < self.config.B_size:
-            packet = {
-                'size': size,
-                'created_at': self.env.now,
-                'ue_id': self.id
-            }
-            self.ul_buffer.append(packet)
+        if self.ul_buffer.push(size, self.env.now):
+            self.network.pinned_ues[self.id] = self
+            
+            # Réveiller le scheduler de l'eNB si l'UE est déjà CONNECTED
+            self.serving_enb.update_ul_backlog(self)
             
             # Déclencher la transmission si nécessaire
             if self.state == "IDLE" and self.config.ecm_enabled:
-                self.env.process(self.transition_to_connected())
+                self.request_connection()
         else:
             self.packets_dropped += 1
     
-    def receive_dl_packet(self, packet):
-        """Reçoit un paquet DL"""
+    def receive_dl_packet(self, created_at, received_at):
+        """Reçoit un paquet DL créé à l'instant created_at (réception estimée à received_at)"""
         self.packets_received += 1
         
         # Mesurer la latence (temps entre création et réception)
-        latency = self.env.now - packet['created_at']
-        self.network.metrics.record_dl_latency(latency)
+        latency = received_at - created_at
+        self.network.metrics.record_dl_latency(latency, self.serving_enb.id)
+    
+    def request_connection(self):
+        """Demande la transition vers CONNECTED et retourne la procédure RRC Setup
+        en cours, en la rejoignant si elle a déjà été lancée"""
+        if self.rrc_setup is None or not self.rrc_setup.is_alive:
+            self.rrc_setup = self.env.process(self.transition_to_connected())
+        return self.rrc_setup
     
     def transition_to_connected(self):
         """Transition de l'état IDLE à CONNECTED"""
@@ -144,43 +224,60 @@ class UE:
             self.update_state("IDLE")
     
     def reset_inactivity_timer(self):
-        """Réinitialise le timer d'inactivité"""
-        if hasattr(self, 'inactivity_timer') and self.inactivity_timer is not None:
-            self.inactivity_timer.interrupt()
+        """Réinitialise le timer d'inactivité (repousse l'échéance, sans nouveau processus)"""
+        self.last_activity = self.env.now
         
-        if self.config.ecm_enabled and self.state == "CONNECTED":
+        # Un seul processus de timer par période CONNECTED
+        if self.config.ecm_enabled and self.state == "CONNECTED" and \
+                (self.inactivity_timer is None or not self.inactivity_timer.is_alive):
             self.inactivity_timer = self.env.process(self.inactivity_timeout())
     
     def inactivity_timeout(self):
-        """Processus qui gère le timer d'inactivité"""
-        try:
-            yield self.env.timeout(self.config.T_inactivity_C_I)
-            # Déclencher la transition vers IDLE si toujours en CONNECTED
-            if self.state == "CONNECTED":
-                yield self.env.process(self.transition_to_idle())
-        except simpy.Interrupt:
-            # Le timer a été réinitialisé
-            pass
+        """Processus qui gère le timer d'inactivité (échéance last_activity + T_inactivity_C_I)"""
+        # À chaque réveil, revérifier l'échéance : une activité a pu la repousser entre-temps
+        while True:
+            remaining = self.last_activity + self.config.T_inactivity_C_I - self.env.now
+            if remaining <= 0:
+                break
+            yield self.env.timeout(remaining)
+        
+        # Déclencher la transition vers IDLE si toujours en CONNECTED
+        if self.state == "CONNECTED":
+            yield self.env.process(self.transition_to_idle())
     
     def update_state(self, new_state):
         """Met à jour l'état de l'UE et les métriques associées"""
         if self.state != new_state:
-            now = self.env.now
-            duration = now - self.last_state_change
-            
-            if self.state == "IDLE":
-                self.time_in_idle += duration
-            else:  # CONNECTED
-                self.time_in_connected += duration
-            
-            self.last_state_change = now
+            self.accumulate_state_interval()
             self.state = new_state
             
             # Notifier le collecteur de métriques
             self.network.metrics.record_state_change(self, new_state)
     
+    def accumulate_state_interval(self):
+        """Comptabilise le temps (et l'énergie) passé dans l'état courant depuis le dernier changement"""
+        now = self.env.now
+        duration = now - self.last_state_change
+        
+        if self.state == "IDLE":
+            self.time_in_idle += duration
+        else:  # CONNECTED
+            self.time_in_connected += duration
+        
+        # Énergie de base de l'intervalle (les surcoûts Tx/Rx sont ajoutés au scheduling)
+        if self.config.energy_accounting == "interval":
+            self.energy_consumed += self.get_state_power() * duration / 1000.0  # Conversion en joules
+        
+        self.last_state_change = now
+    
+    def get_state_power(self):
+        """Retourne la puissance de base (mW) associée à l'état ECM courant"""
+        if self.state == "IDLE":
+            return self.config.P_Idle
+        return self.config.P_Connected_Base
+    
     def energy_consumption_process(self):
-        """Processus qui calcule la consommation d'énergie en continu"""
+        """Processus qui calcule la consommation d'énergie en continu (mode "periodic")"""
         last_update = self.env.now
         
         while True:
@@ -190,12 +287,7 @@ class UE:
             duration = now - last_update
             
             # Calculer la consommation selon l'état
-            if self.state == "IDLE":
-                power = self.config.P_Idle
-            else:  # CONNECTED
-                power = self.config.P_Connected_Base
-                # Ajouter le surcoût si transmission/réception active
-                # (Cette partie serait plus précise si intégrée directement au scheduling)
+            power = self.get_state_power()
             
             # Mettre à jour la consommation totale
             self.energy_consumed += power * duration / 1000.0  # Conversion en joules
@@ -205,48 +297,107 @@ class UE:
 class eNodeB:
     """Représentation d'un eNodeB"""
     
-    def __init__(self, enb_id, env, network, position, config):
+    def __init__(self, enb_id, env, network, position, config, rng):
         self.id = enb_id
         self.env = env
         self.network = network
         self.position = position
         self.config = config
+        self.rng = rng  # Générateur aléatoire propre au run
         
         # Allocation RNTIs
         self.rnti_pool = set(range(1, 2**16 + 1))  # Pool de 2^16 RNTIs disponibles
         self.allocated_rntis = {}  # Mapping UE -> RNTI
         
         # UEs servis par cet eNodeB
-        self.connected_ues = set()
-        self.all_served_ues = set()  # Tous les UEs servis sur 24h
+        # (conteneurs ordonnés pour un parcours déterministe d'un run à l'autre)
+        self.connected_ues = {}  # UE_id -> UE
+        # UEs CONNECTED avec données en attente, dans l'ordre de service (UE_id -> UE)
+        self.backlog_ul = {}
+        self.backlog_dl = {}
+        self.served_ue_ids = np.zeros(0, dtype=np.int64)  # Registre de tous les UEs servis sur 24h (rang = cell_slot)
         
-        # Buffers DL par UE
-        self.dl_buffers = {}  # UE_id -> buffer
+        # Buffers DL des UEs ayant des paquets en attente (créés au premier paquet, supprimés une fois vidés)
+        self.dl_buffers = {}  # UE_id -> PacketQueue
+        
+        # Tableaux (UE, profil) pour la génération DL par lots
+        self.dl_profiles = []
+        self.dl_ue_ids = np.zeros(0, dtype=np.int64)
+        self.dl_profile_rows = np.zeros(0, dtype=np.int64)
+        self.dl_activity_levels = np.zeros((0, config.N_intervals))  # Lignes de la matrice d'activité des profils
+        self.dl_traffic_arrays_size = 0
         
         # Créer le scheduler approprié
-        if config.scheduler_algo == "RR":
-            self.scheduler = RoundRobinScheduler(self, config)
-        elif config.scheduler_algo == "PF":
-            self.scheduler = ProportionalFairScheduler(self, config)
+        self.scheduler = self.create_scheduler()
         
         # Démarrer le processus de scheduling
+        self.tti_index = 0
+        self.backlog_event = None  # Événement de réveil en mode "event"
         self.env.process(self.scheduling_process())
         
         # Générer du trafic DL pour les UEs
         self.env.process(self.generate_dl_traffic())
+        
+        # Réveils des UEs en période OFF (mode "hybrid") : file de priorité (instant, UE_id)
+        self.wakeups = []
+        self.next_wakeup = None   # Échéance attendue par le processus de réveil
+        self.wakeup_signal = None  # Déclenché si un réveil plus proche est planifié
+        if config.traffic_mode == "hybrid":
+            self.env.process(self.wakeup_process())
+    
+    def create_scheduler(self):
+        """Crée le scheduler correspondant à config.scheduler_algo"""
+        if self.config.scheduler_algo == "RR":
+            return RoundRobinScheduler(self, self.config)
+        elif self.config.scheduler_algo == "PF":
+            return ProportionalFairScheduler(self, self.config)
     
-    def register_ue(self, ue):
+    def register_ues(self, ue_ids):
+        """Enregistre en bloc des UEs servis par cet eNodeB (identifiants croissants)"""
+        ue_ids = np.asarray(ue_ids, dtype=np.int64)
+        self.network.population.cell_slot[ue_ids] = len(self.served_ue_ids) + np.arange(len(ue_ids))
+        self.served_ue_ids = np.concatenate((self.served_ue_ids, ue_ids))
+    
+    def register_ue(self, ue_id):
         """Enregistre un nouvel UE servi par cet eNodeB"""
-        self.all_served_ues.add(ue)
-        self.dl_buffers[ue.id] = []
+        self.register_ues([ue_id])
+    
+    def schedule_wakeup(self, ue, time):
+        """Planifie le début de la prochaine période ON d'un UE (mode "hybrid")"""
+        heapq.heappush(self.wakeups, (time, ue.id))
+        
+        # Réveiller le processus s'il attend une échéance plus lointaine (ou aucune)
+        if self.wakeup_signal is not None and not self.wakeup_signal.triggered and \
+                (self.next_wakeup is None or time < self.next_wakeup):
+            self.wakeup_signal.succeed()
+    
+    def wakeup_process(self):
+        """Processus unique réveillant les UEs de la cellule à la fin de leur période OFF"""
+        while True:
+            self.wakeup_signal = self.env.event()
+            if self.wakeups:
+                self.next_wakeup = self.wakeups[0][0]
+                yield self.env.timeout(max(0, self.next_wakeup - self.env.now)) | self.wakeup_signal
+            else:
+                self.next_wakeup = None
+                yield self.wakeup_signal
+            
+            # Promouvoir en processus tous les UEs dont l'échéance est atteinte (créés au besoin)
+            while self.wakeups and self.wakeups[0][0] <= self.env.now:
+                _, ue_id = heapq.heappop(self.wakeups)
+                self.network.get_ue(ue_id).wake_up()
     
     def allocate_rnti(self, ue):
         """Alloue un RNTI à un UE"""
+        if ue.id in self.allocated_rntis:
+            # UE déjà connecté : pas de second RNTI
+            return True
         if len(self.rnti_pool) > 0:
             rnti = self.rnti_pool.pop()
             self.allocated_rntis[ue.id] = rnti
             ue.rnti = rnti
-            self.connected_ues.add(ue)
+            self.connected_ues[ue.id] = ue
+            self.update_backlog(ue)
             return True
         else:
             # Pas de RNTI disponible
@@ -257,93 +408,205 @@ class eNodeB:
         if ue.id in self.allocated_rntis:
             rnti = self.allocated_rntis.pop(ue.id)
             self.rnti_pool.add(rnti)
-            self.connected_ues.discard(ue)
+            self.connected_ues.pop(ue.id, None)
+            self.update_backlog(ue)
             return True
         return False
     
     def add_dl_packet(self, ue_id, size):
         """Ajoute un paquet dans le buffer DL pour un UE"""
-        if ue_id in self.dl_buffers:
-            if len(self.dl_buffers[ue_id]) < self.config.B_size:
-                packet = {
-                    'size': size,
-                    'created_at': self.env.now,
-                    'ue_id': ue_id
-                }
-                self.dl_buffers[ue_id].append(packet)
-                
-                # Rechercher l'UE correspondant
-                target_ue = next((ue for ue in self.all_served_ues if ue.id == ue_id), None)
-                
-                # Si UE en IDLE et ECM activé, déclencher paging et transition
-                if target_ue and target_ue.state == "IDLE" and self.config.ecm_enabled:
-                    self.env.process(target_ue.transition_to_connected())
-            else:
-                # Buffer plein, paquet perdu
-                self.network.metrics.record_dl_packet_dropped()
+        population = self.network.population
+        if population.serving_enb[ue_id] != self.id:
+            return
+        
+        buffer = self.dl_buffers.get(ue_id)
+        if buffer is None:
+            buffer = self.dl_buffers[ue_id] = PacketQueue(self.config.B_size)
+        
+        if buffer.push(size, self.env.now):
+            target_ue = self.connected_ues.get(ue_id)
+            if target_ue is not None:
+                # Réveiller le scheduler : l'UE est déjà CONNECTED
+                self.update_dl_backlog(target_ue)
+            elif population.state[ue_id] == STATE_IDLE and self.config.ecm_enabled:
+                # UE en IDLE et ECM activé : paging et transition (UE créé au besoin)
+                self.network.get_ue(ue_id).request_connection()
+        else:
+            # Buffer plein, paquet perdu
+            self.network.metrics.record_dl_packet_dropped()
+    
+    def build_dl_traffic_arrays(self):
+        """Construit les tableaux NumPy (UE, profil) utilisés par la génération DL par lots"""
+        profile_ids, self.dl_profile_rows = np.unique(self.network.population.profile_idx[self.served_ue_ids],
+                                                      return_inverse=True)
+        self.dl_profiles = [self.network.profiles[profile_id] for profile_id in profile_ids.tolist()]
+        
+        self.dl_ue_ids = self.served_ue_ids.copy()
+        self.dl_profile_rows = self.dl_profile_rows.astype(np.int64)
+        self.dl_activity_levels = np.array([profile.activity_levels for profile in self.dl_profiles])
+        self.dl_traffic_arrays_size = len(self.served_ue_ids)
     
     def generate_dl_traffic(self):
-        """Génère du trafic DL pour les UEs selon leurs profils"""
+        """Génère du trafic DL pour les UEs selon leurs profils (tirages vectorisés par cycle)"""
         # Attendre la fin de la période de chauffe
         if self.env.now < self.config.T_warmup:
             yield self.env.timeout(self.config.T_warmup - self.env.now)
         
         while True:
-            # Générer les paquets DL pour tous les UEs servis
-            for ue in self.all_served_ues:
+            # (Re)construire les tableaux si de nouveaux UEs ont été enregistrés
+            if self.dl_traffic_arrays_size != len(self.served_ue_ids):
+                self.build_dl_traffic_arrays()
+            
+            if len(self.dl_ue_ids) > 0:
                 # Déterminer l'intervalle global actuel
                 current_interval = int((self.env.now - self.config.T_warmup) / self.config.dt_global) % self.config.N_intervals
                 
-                # Probabilité de génération basée sur le profil et l'activité
-                activity_level = ue.profile.get_activity_level(current_interval)
-                dl_probability = ue.profile.get_dl_probability(activity_level)
+                # Probabilité et taille des paquets : un calcul par profil, indexé ensuite par UE
+                activity_levels = self.dl_activity_levels[:, current_interval % self.dl_activity_levels.shape[1]].tolist()
+                dl_probability = np.array([profile.get_dl_probability(level)
+                                           for profile, level in zip(self.dl_profiles, activity_levels)])
+                size_params = np.array([profile.get_dl_packet_size_params(level)
+                                        for profile, level in zip(self.dl_profiles, activity_levels)])
+                
+                # Tirages de Bernoulli pour tous les UEs de la cellule
+                selected = np.flatnonzero(self.rng.random(len(self.dl_ue_ids)) < dl_probability[self.dl_profile_rows])
                 
-                # Décider si un paquet DL est généré pour cet UE
-                if np.random.random() < dl_probability:
-                    packet_size = ue.profile.get_dl_packet_size(activity_level)
-                    self.add_dl_packet(ue.id, packet_size)
+                if len(selected) > 0:
+                    rows = self.dl_profile_rows[selected]
+                    packet_sizes = self.rng.normal(size_params[rows, 0], size_params[rows, 1]).astype(np.int64)
+                    
+                    # N'enfiler que les UEs ayant reçu un paquet
+                    for ue_id, packet_size in zip(self.dl_ue_ids[selected].tolist(), packet_sizes.tolist()):
+                        self.add_dl_packet(ue_id, packet_size)
             
             # Attendre avant le prochain cycle de génération
             yield self.env.timeout(0.1)  # 100 ms entre les cycles de génération
     
+    def has_pending_data(self):
+        """Indique si au moins un UE CONNECTED a des données en attente (UL ou DL)"""
+        return len(self.backlog_ul) > 0 or len(self.backlog_dl) > 0
+    
+    def update_ul_backlog(self, ue, requeue=False):
+        """Met à jour la présence de l'UE dans la file UL (CONNECTED avec données UL en attente)"""
+        if ue.id in self.connected_ues and ue.ul_buffer.count > 0:
+            if requeue:
+                # UE servi : il repasse en fin de file
+                self.backlog_ul.pop(ue.id, None)
+            self.backlog_ul.setdefault(ue.id, ue)
+            self.notify_backlog()
+        else:
+            self.backlog_ul.pop(ue.id, None)
+    
+    def update_dl_backlog(self, ue, requeue=False):
+        """Met à jour la présence de l'UE dans la file DL (CONNECTED avec données DL en attente)"""
+        if ue.id in self.connected_ues and ue.id in self.dl_buffers:
+            if requeue:
+                # UE servi : il repasse en fin de file
+                self.backlog_dl.pop(ue.id, None)
+            self.backlog_dl.setdefault(ue.id, ue)
+            self.notify_backlog()
+        else:
+            self.backlog_dl.pop(ue.id, None)
+    
+    def update_backlog(self, ue):
+        """Met à jour les files UL et DL d'un UE (connexion ou libération)"""
+        self.update_ul_backlog(ue)
+        self.update_dl_backlog(ue)
+    
+    def notify_backlog(self):
+        """Réveille le processus de scheduling s'il attend des données"""
+        if self.backlog_event is not None and not self.backlog_event.triggered:
+            self.backlog_event.succeed()
+    
+    def next_tti_index(self):
+        """Retourne l'indice du prochain TTI non encore traité (à partir de l'instant courant),
+        aligné sur le début d'une fenêtre d'ordonnancement de scheduling_window TTIs"""
+        now = self.env.now
+        dt = self.config.dt_local
+        tti = int(now / dt)
+        # Corriger les arrondis flottants autour des frontières de TTI
+        while tti * dt < now:
+            tti += 1
+        while tti > 1 and (tti - 1) * dt >= now:
+            tti -= 1
+        window = self.config.scheduling_window
+        tti = -(-tti // window) * window
+        return max(tti, self.tti_index + window)
+    
     def scheduling_process(self):
-        """Processus d'ordonnancement exécuté à chaque TTI"""
+        """Processus d'ordonnancement exécuté à chaque TTI (ou fenêtre de scheduling_window TTIs)"""
         while True:
-            # Attendre le prochain TTI
-            yield self.env.timeout(self.config.dt_local)
+            # Mode événementiel : dormir tant qu'aucun UE CONNECTED n'a de données
+            if self.config.scheduling_mode == "event":
+                while not self.has_pending_data():
+                    self.backlog_event = self.env.event()
+                    yield self.backlog_event
+                    self.backlog_event = None
             
-            # Trouver les UEs éligibles (CONNECTED avec données en attente)
-            eligible_ues_ul = [ue for ue in self.connected_ues if len(ue.ul_buffer) > 0]
-            eligible_ues_dl = [ue for ue in self.connected_ues 
-                              if ue.id in self.dl_buffers and len(self.dl_buffers[ue.id]) > 0]
+            # Attendre le prochain TTI (grille alignée sur des multiples de dt_local).
+            # Le TTI est traité après les arrivées du même instant, dans les deux modes.
+            self.tti_index = self.next_tti_index()
+            yield TTIEvent(self.env, self.tti_index * self.config.dt_local - self.env.now,
+                           TTI_PRIORITY + self.id)
             
-            # Exécuter le scheduler pour allouer les RBs
-            scheduled_ues_ul = self.scheduler.schedule_ul(eligible_ues_ul)
-            scheduled_ues_dl = self.scheduler.schedule_dl(eligible_ues_dl)
-            
-            # Traiter les transmissions UL
-            for ue, rb_count in scheduled_ues_ul:
-                self.process_ul_transmission(ue, rb_count)
-            
-            # Traiter les transmissions DL
-            for ue, rb_count in scheduled_ues_dl:
-                self.process_dl_transmission(ue, rb_count)
+            self.run_tti()
+    
+    def run_tti(self):
+        """Exécute l'ordonnancement et les transmissions d'un TTI (ou d'une fenêtre de TTIs)"""
+        # UEs éligibles (CONNECTED avec données en attente), maintenus de façon incrémentale
+        eligible_ues_ul = list(self.backlog_ul.values())
+        eligible_ues_dl = list(self.backlog_dl.values())
+        
+        # Exécuter le scheduler pour allouer les RBs
+        scheduled_ues_ul = self.scheduler.schedule_ul(eligible_ues_ul)
+        scheduled_ues_dl = self.scheduler.schedule_dl(eligible_ues_dl)
+        
+        # Traiter les transmissions UL
+        for ue, rb_count in scheduled_ues_ul:
+            self.process_ul_transmission(ue, rb_count)
+            self.update_ul_backlog(ue, requeue=True)
+        
+        # Traiter les transmissions DL
+        for ue, rb_count in scheduled_ues_dl:
+            self.process_dl_transmission(ue, rb_count)
+            self.update_dl_backlog(ue, requeue=True)
+    
+    def window_ttis(self, bits, capacity):
+        """Nombre de TTIs de la fenêtre d'ordonnancement occupés pour transmettre bits sur une capacité
+        allouée de capacity bits (allocation supposée répartie uniformément sur la fenêtre)"""
+        window = self.config.scheduling_window
+        if window == 1:
+            return 1
+        return min(window, max(1, math.ceil(bits / capacity * window)))
+    
+    def estimate_departure(self, created_at, bits, capacity):
+        """Instant de départ estimé d'un paquet dans la fenêtre d'ordonnancement qui s'achève à l'instant
+        courant : dernier TTI occupé par les bits déjà servis de l'UE, mais pas avant le premier TTI
+        suivant la création du paquet (correction de l'attente jusqu'à la fin de la fenêtre)"""
+        window = self.config.scheduling_window
+        if window == 1:
+            return self.env.now
+        
+        dt = self.config.dt_local
+        slot = self.env.now - (window - self.window_ttis(bits, capacity)) * dt
+        first_tti = math.ceil(created_at / dt - 1e-9) * dt
+        return max(slot, min(first_tti, self.env.now))
     
     def process_ul_transmission(self, ue, rb_count):
         """Traite la transmission UL d'un paquet"""
-        if len(ue.ul_buffer) > 0 and rb_count > 0:
+        if ue.ul_buffer.count > 0 and rb_count > 0:
             # Capacité de transmission avec les RBs alloués
             capacity = rb_count * self.config.R_RB  # bits
             
             # Traiter autant de paquets que possible avec la capacité allouée
             bits_sent = 0
-            while len(ue.ul_buffer) > 0 and bits_sent + ue.ul_buffer[0]['size'] <= capacity:
-                packet = ue.ul_buffer.pop(0)
-                bits_sent += packet['size']
+            while ue.ul_buffer.count > 0 and bits_sent + ue.ul_buffer.head_size() <= capacity:
+                size, created_at = ue.ul_buffer.pop()
+                bits_sent += size
                 
-                # Mesurer la latence
-                latency = self.env.now - packet['created_at']
-                self.network.metrics.record_ul_latency(latency)
+                # Mesurer la latence (départ estimé dans la fenêtre d'ordonnancement)
+                latency = self.estimate_departure(created_at, bits_sent, capacity) - created_at
+                self.network.metrics.record_ul_latency(latency, self.id)
                 
                 # Comptabiliser le paquet envoyé
                 ue.packets_sent += 1
@@ -351,32 +614,43 @@ class eNodeB:
                 # Réinitialiser le timer d'inactivité
                 ue.reset_inactivity_timer()
             
+            # Buffer vidé : l'UE n'a plus besoin d'être retenu
+            if ue.ul_buffer.count == 0:
+                self.network.pinned_ues.pop(ue.id, None)
+            
             # Mettre à jour les métriques
-            self.network.metrics.record_ul_throughput(bits_sent, ue)
+            active_ttis = self.window_ttis(bits_sent, capacity)
+            self.network.metrics.record_ul_throughput(bits_sent, ue, self.id, active_ttis)
             
             # Ajouter le surcoût énergétique de la transmission
-            ue.energy_consumed += self.config.P_Tx_Active * self.config.dt_local / 1000.0
+            ue.energy_consumed += self.config.P_Tx_Active * self.config.dt_local * active_ttis / 1000.0
     
     def process_dl_transmission(self, ue, rb_count):
         """Traite la transmission DL d'un paquet"""
-        if ue.id in self.dl_buffers and len(self.dl_buffers[ue.id]) > 0 and rb_count > 0:
+        if ue.id in self.dl_buffers and self.dl_buffers[ue.id].count > 0 and rb_count > 0:
             # Capacité de transmission avec les RBs alloués
             capacity = rb_count * self.config.R_RB  # bits
             
             # Traiter autant de paquets que possible avec la capacité allouée
             bits_sent = 0
-            while len(self.dl_buffers[ue.id]) > 0 and bits_sent + self.dl_buffers[ue.id][0]['size'] <= capacity:
-                packet = self.dl_buffers[ue.id].pop(0)
-                bits_sent += packet['size']
+            buffer = self.dl_buffers[ue.id]
+            while buffer.count > 0 and bits_sent + buffer.head_size() <= capacity:
+                size, created_at = buffer.pop()
+                bits_sent += size
                 
-                # Envoyer le paquet à l'UE
-                ue.receive_dl_packet(packet)
+                # Envoyer le paquet à l'UE (réception estimée dans la fenêtre d'ordonnancement)
+                ue.receive_dl_packet(created_at, self.estimate_departure(created_at, bits_sent, capacity))
                 
                 # Réinitialiser le timer d'inactivité
                 ue.reset_inactivity_timer()
             
+            # Buffer vidé : supprimé jusqu'au prochain paquet
+            if buffer.count == 0:
+                del self.dl_buffers[ue.id]
+            
             # Mettre à jour les métriques
-            self.network.metrics.record_dl_throughput(bits_sent, ue)
+            active_ttis = self.window_ttis(bits_sent, capacity)
+            self.network.metrics.record_dl_throughput(bits_sent, ue, self.id, active_ttis)
             
             # Ajouter le surcoût énergétique de la réception
-            ue.energy_consumed += self.config.P_Rx_Active * self.config.dt_local / 1000.0
\ No newline at end of file
+            ue.energy_consumed += self.config.P_Rx_Active * self.config.dt_local * active_ttis / 1000.0
\ No newline at end of file
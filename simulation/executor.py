@@ -0,0 +1,106 @@
+import os
+import multiprocessing as mp
+from collections import deque
+from multiprocessing.connection import wait
+
+
+class WorkerCrashed(RuntimeError):
+    """Le processus d'un run s'est terminé sans renvoyer de résultat"""
+
+
+def _execute_task(run_function, config, conn):
+    """Point d'entrée du processus worker : exécute un run et renvoie (résultats, erreur)"""
+    try:
+        conn.send((run_function(config), None))
+    except Exception as error:
+        try:
+            conn.send((None, error))
+        except Exception:
+            # Exception non picklable : renvoyer sa représentation
+            conn.send((None, RuntimeError(repr(error))))
+    finally:
+        conn.close()
+
+
+def run_in_process(run_function, tasks, skip=None, ready=None):
+    """Exécute les tâches [(clé, config)] une à une dans le processus courant,
+    avec la même interface que RunExecutor.run (ready est sans effet : aucun run n'est actif au lancement)"""
+    for key, config in tasks:
+        if skip is not None and skip(key):
+            continue
+        try:
+            yield key, run_function(config), None
+        except Exception as error:
+            yield key, None, error
+
+
+class RunExecutor:
+    """Exécute des runs de simulation indépendants en parallèle, un processus par run"""
+    
+    def __init__(self, run_function, max_workers=None, max_retries=1, start_method=None, daemon=True, slots=None):
+        self.run_function = run_function  # Fonction config -> résultats (picklable, sauf avec "fork")
+        self.max_workers = max_workers or os.cpu_count()
+        self.max_retries = max_retries  # Nouvelles tentatives après la mort d'un worker
+        self.context = mp.get_context(start_method)  # "fork" : workers hérités de l'état du parent
+        self.daemon = daemon  # Un worker démon ne peut pas lancer lui-même de processus
+        self.slots = slots  # Sémaphore partagé entre plusieurs exécuteurs : borne commune du nombre de workers
+    
+    def start_task(self, key, config):
+        """Lance le processus d'un run et retourne l'extrémité de lecture de son canal"""
+        receiver, sender = self.context.Pipe(duplex=False)
+        process = self.context.Process(target=_execute_task,
+                                       args=(self.run_function, config, sender), daemon=self.daemon)
+        process.start()
+        sender.close()
+        return receiver, process
+    
+    def run(self, tasks, skip=None, ready=None):
+        """Exécute les tâches [(clé, config)] et renvoie (clé, résultats, erreur) au fil de l'eau ;
+        skip(clé), évalué au lancement de chaque tâche, permet d'abandonner les tâches devenues inutiles,
+        et une tâche dont ready(clé) est faux reste en file tant que d'autres runs sont actifs"""
+        queue = deque(tasks)
+        attempts = {}
+        running = {}  # canal -> (clé, config, processus)
+        
+        while queue or running:
+            if skip is not None:
+                queue = deque(task for task in queue if not skip(task[0]))
+            
+            # Garder au plus max_workers runs actifs (et un emplacement libre par run si la borne est partagée ;
+            # l'attente n'est bloquante que sans run actif, sinon leurs résultats ne seraient plus lus)
+            waiting_slot = False
+            while queue and len(running) < self.max_workers:
+                task = next((task for task in queue if ready is None or not running or ready(task[0])), None)
+                if task is None:
+                    break  # Tâches restantes en attente de résultats
+                if self.slots is not None and not self.slots.acquire(block=not running):
+                    waiting_slot = True
+                    break
+                queue.remove(task)
+                key, config = task
+                receiver, process = self.start_task(key, config)
+                running[receiver] = (key, config, process)
+            if not running:
+                continue  # Tâches restantes toutes abandonnées
+            
+            # Emplacement attendu : revenir régulièrement le demander (il peut être libéré par un autre exécuteur)
+            for receiver in wait(list(running), timeout=0.1 if waiting_slot else None):
+                key, config, process = running.pop(receiver)
+                try:
+                    results, error = receiver.recv()
+                except EOFError:
+                    # Le worker est mort (crash, OOM...) : seul ce run est relancé
+                    process.join()
+                    attempts[key] = attempts.get(key, 0) + 1
+                    if attempts[key] <= self.max_retries:
+                        queue.append((key, config))
+                        continue
+                    results, error = None, WorkerCrashed(f"exit code {process.exitcode}")
+                finally:
+                    receiver.close()
+                    if self.slots is not None:
+                        process.join()
+                        self.slots.release()  # Libéré par le parent : un worker mort ne garde pas son emplacement
+                
+                process.join()
+                yield key, results, error
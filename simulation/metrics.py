@@ -2,11 +2,12 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from collections import defaultdict
+from simulation.sketches import StreamingStats
 
 class MetricsCollector:
     """Collecte et analyse les métriques de la simulation"""
     
-    def __init__(self, config):
+    def __init__(self, config, writer=None):
         self.config = config
         
         # Métriques RNTI
@@ -18,16 +19,26 @@ class MetricsCollector:
         self.energy_per_ue = {}  # ue_id -> énergie totale (J)
         self.idle_time_per_ue = {}  # ue_id -> temps en IDLE (s)
         self.connected_time_per_ue = {}  # ue_id -> temps en CONNECTED (s)
+        self.avg_energy = 0  # Énergie moyenne par UE (fin de run)
         
         # Métriques QoS - Latence
         self.idle_to_connected_latency = []
-        self.ul_latency = []
+        self.ul_latency = []  # Échantillons (mode "samples")
         self.dl_latency = []
+        self.ul_latency_stats = defaultdict(StreamingStats)  # enb_id -> statistiques (mode "streaming")
+        self.dl_latency_stats = defaultdict(StreamingStats)
         self.first_packet_latency = []
         
         # Métriques QoS - Débit
-        self.ul_throughput_per_ue = defaultdict(list)  # ue_id -> [throughput_samples]
-        self.dl_throughput_per_ue = defaultdict(list)  # ue_id -> [throughput_samples]
+        # Accumulateurs préalloués indexés par UE_id : bits transmis et TTIs actifs
+        self.ul_bits_per_ue = np.zeros(config.N_UE, dtype=np.int64)
+        self.dl_bits_per_ue = np.zeros(config.N_UE, dtype=np.int64)
+        self.ul_active_ttis_per_ue = np.zeros(config.N_UE, dtype=np.int64)
+        self.dl_active_ttis_per_ue = np.zeros(config.N_UE, dtype=np.int64)
+        # Totaux de bits par intervalle global (dt_global) et par eNB
+        n_bins = int(np.ceil(config.T_sim / config.dt_global))
+        self.ul_bits_per_interval = np.zeros((n_bins, config.N_eNB), dtype=np.int64)
+        self.dl_bits_per_interval = np.zeros((n_bins, config.N_eNB), dtype=np.int64)
         self.ul_packets_sent = 0
         self.ul_packets_dropped = 0
         self.dl_packets_sent = 0
@@ -38,6 +49,18 @@ class MetricsCollector:
         # Intervalles d'échantillonnage pour certaines métriques
         self.sampling_interval = 60  # seconds
         self.last_sampling = 0
+        
+        # Stockage en colonnes du run (None : résultats gardés en mémoire)
+        self.writer = None
+        if writer is not None:
+            self.attach_writer(writer)
+    
+    def attach_writer(self, writer):
+        """Écrit désormais les séries temporelles au fil du run dans le stockage en colonnes"""
+        self.writer = writer
+        writer.add_column("rnti_usage", row_shape=(3,))  # (temps, eNB, RNTI utilisés)
+        writer.add_column("buffer_occupancy_ul", row_shape=(2,))  # (temps, occupation moyenne)
+        writer.add_column("buffer_occupancy_dl", row_shape=(2,))
     
     def update_periodic_metrics(self, env, network):
         """Mise à jour des métriques échantillonnées périodiquement"""
@@ -45,30 +68,43 @@ class MetricsCollector:
         
         if current_time - self.last_sampling >= self.sampling_interval and current_time >= self.config.T_warmup:
             # Collecter les métriques RNTI
+            rnti_usage = []
             for enb in network.enbs:
-                rnti_usage = len(enb.allocated_rntis)
-                self.rnti_usage.append((current_time, enb.id, rnti_usage))
+                rnti_usage.append((current_time, enb.id, len(enb.allocated_rntis)))
                 self.max_connected_ues[enb.id] = max(self.max_connected_ues[enb.id], len(enb.connected_ues))
+            self.record_samples("rnti_usage", rnti_usage)
             
-            # Collecter les métriques de buffer
-            ul_occupancy = []
-            dl_occupancy = []
-            
-            for ue in network.ues:
-                ul_occupancy.append(len(ue.ul_buffer) / self.config.B_size)
-            
+            # Collecter les métriques de buffer : occupation de chaque UE servi, rangée par eNB puis par
+            # cell_slot (seuls les UEs ayant des paquets en attente sont parcourus, les autres valent 0)
+            offsets = {}
+            n_served = 0
             for enb in network.enbs:
-                for buffer in enb.dl_buffers.values():
-                    dl_occupancy.append(len(buffer) / self.config.B_size)
-            
-            if ul_occupancy:
-                self.buffer_occupancy_ul.append((current_time, np.mean(ul_occupancy)))
+                offsets[enb.id] = n_served
+                n_served += len(enb.served_ue_ids)
             
-            if dl_occupancy:
-                self.buffer_occupancy_dl.append((current_time, np.mean(dl_occupancy)))
+            if n_served > 0:
+                population = network.population
+                ul_occupancy = np.zeros(n_served)
+                dl_occupancy = np.zeros(n_served)
+                for ue_id, ue in network.pinned_ues.items():
+                    ul_occupancy[offsets[population.serving_enb[ue_id]] + population.cell_slot[ue_id]] = \
+                        len(ue.ul_buffer) / self.config.B_size
+                for enb in network.enbs:
+                    for ue_id, buffer in enb.dl_buffers.items():
+                        dl_occupancy[offsets[enb.id] + population.cell_slot[ue_id]] = len(buffer) / self.config.B_size
+                
+                self.record_samples("buffer_occupancy_ul", [(current_time, np.mean(ul_occupancy))])
+                self.record_samples("buffer_occupancy_dl", [(current_time, np.mean(dl_occupancy))])
             
             self.last_sampling = current_time
     
+    def record_samples(self, name, samples):
+        """Ajoute des échantillons à une série temporelle, en mémoire ou dans le stockage en colonnes"""
+        if self.writer is not None:
+            self.writer.append(name, samples)
+        else:
+            getattr(self, name).extend(samples)
+    
     def record_state_change(self, ue, new_state):
         """Enregistre un changement d'état d'un UE"""
         if new_state == "CONNECTED" and ue.state == "IDLE":
@@ -76,27 +112,79 @@ class MetricsCollector:
             transition_time = ue.env.now - ue.last_state_change
             self.idle_to_connected_latency.append(transition_time)
     
-    def record_ul_latency(self, latency):
+    def record_ul_latency(self, latency, enb_id=None):
         """Enregistre la latence d'un paquet UL"""
-        self.ul_latency.append(latency)
+        if self.config.latency_stats == "streaming":
+            self.ul_latency_stats[enb_id].add(latency)
+        else:
+            self.ul_latency.append(latency)
         self.ul_packets_sent += 1
     
-    def record_dl_latency(self, latency):
+    def record_dl_latency(self, latency, enb_id=None):
         """Enregistre la latence d'un paquet DL"""
-        self.dl_latency.append(latency)
+        if self.config.latency_stats == "streaming":
+            self.dl_latency_stats[enb_id].add(latency)
+        else:
+            self.dl_latency.append(latency)
         self.dl_packets_sent += 1
     
-    def record_ul_throughput(self, bits, ue):
-        """Enregistre le débit instantané UL pour un UE"""
+    def summarize_latency(self, samples, stats_per_enb):
+        """Résume une latence (moyenne, écart-type, percentiles) selon le mode de collecte"""
+        if self.config.latency_stats == "streaming":
+            summary = StreamingStats.merged(stats_per_enb.values()).summary()
+            summary.pop("count")
+            return summary
+        
+        return {
+            "mean": np.mean(samples) if samples else 0,
+            "std": np.std(samples) if samples else 0,
+            "percentile_50": np.percentile(samples, 50) if samples else 0,
+            "percentile_95": np.percentile(samples, 95) if samples else 0,
+            "percentile_99": np.percentile(samples, 99) if samples else 0,
+            "percentile_99_9": np.percentile(samples, 99.9) if samples else 0
+        }
+    
+    def record_ul_throughput(self, bits, ue, enb_id, active_ttis=1):
+        """Enregistre les bits UL transmis par un UE pendant un TTI (ou active_ttis TTIs d'une fenêtre)"""
         if ue.env.now >= self.config.T_warmup:
-            throughput = bits / self.config.dt_local  # bits/s
-            self.ul_throughput_per_ue[ue.id].append(throughput)
+            self.ul_bits_per_ue[ue.id] += bits
+            self.ul_active_ttis_per_ue[ue.id] += active_ttis
+            self.ul_bits_per_interval[self.interval_index(ue.env.now), enb_id] += bits
     
-    def record_dl_throughput(self, bits, ue):
-        """Enregistre le débit instantané DL pour un UE"""
+    def record_dl_throughput(self, bits, ue, enb_id, active_ttis=1):
+        """Enregistre les bits DL reçus par un UE pendant un TTI (ou active_ttis TTIs d'une fenêtre)"""
         if ue.env.now >= self.config.T_warmup:
-            throughput = bits / self.config.dt_local  # bits/s
-            self.dl_throughput_per_ue[ue.id].append(throughput)
+            self.dl_bits_per_ue[ue.id] += bits
+            self.dl_active_ttis_per_ue[ue.id] += active_ttis
+            self.dl_bits_per_interval[self.interval_index(ue.env.now), enb_id] += bits
+    
+    def interval_index(self, now):
+        """Retourne l'indice de l'intervalle global (après la chauffe) contenant l'instant now"""
+        index = int((now - self.config.T_warmup) / self.config.dt_global)
+        return min(index, len(self.ul_bits_per_interval) - 1)
+    
+    def summarize_throughput(self, bits_per_ue, active_ttis_per_ue, bits_per_interval):
+        """Débit moyen par UE (bits/s sur ses TTIs actifs), moyenne globale et totaux par intervalle"""
+        active = np.flatnonzero(active_ttis_per_ue)
+        mean_per_ue = bits_per_ue[active] / (active_ttis_per_ue[active] * self.config.dt_local)
+        
+        return {
+            "mean_per_ue": dict(zip(active.tolist(), mean_per_ue.tolist())),
+            "global_mean": np.mean(mean_per_ue) if len(active) > 0 else 0,
+            "bits_per_interval": bits_per_interval
+        }
+    
+    def global_mean_throughput(self, bits_per_ue, active_ttis_per_ue):
+        """Moyenne sur les UEs actifs de leur débit moyen (bits/s), sans le détail par UE"""
+        active = np.flatnonzero(active_ttis_per_ue)
+        if len(active) == 0:
+            return 0
+        return np.mean(bits_per_ue[active] / (active_ttis_per_ue[active] * self.config.dt_local))
+    
+    @staticmethod
+    def delivery_ratio(sent, dropped):
+        """Packet Delivery Ratio (1 si aucun paquet)"""
+        return sent / (sent + dropped) if (sent + dropped) > 0 else 1.0
     
     def record_rnti_failure(self):
         """Enregistre un échec d'allocation RNTI"""
@@ -112,10 +200,83 @@ class MetricsCollector:
     
     def collect_final_ue_metrics(self, network):
         """Collecte les métriques finales par UE"""
-        for ue in network.ues:
-            self.energy_per_ue[ue.id] = ue.energy_consumed
-            self.idle_time_per_ue[ue.id] = ue.time_in_idle
-            self.connected_time_per_ue[ue.id] = ue.time_in_connected
+        population = network.population
+        population.finalize(network.env.now)
+        
+        # Lecture directe des tableaux de la population (indexés par UE_id)
+        self.set_ue_metrics(population.energy_consumed, population.time_in_idle, population.time_in_connected)
+    
+    def set_ue_metrics(self, energy, idle_time, connected_time):
+        """Enregistre les métriques finales par UE (tableaux indexés par UE_id) : écrites telles quelles
+        dans le stockage en colonnes, ou converties en dictionnaires pour get_results"""
+        self.avg_energy = np.mean(energy) if len(energy) > 0 else 0
+        
+        if self.writer is not None:
+            self.writer.write("energy_per_ue", energy)
+            self.writer.write("idle_time_per_ue", idle_time)
+            self.writer.write("connected_time_per_ue", connected_time)
+        else:
+            self.energy_per_ue = dict(enumerate(energy.tolist()))
+            self.idle_time_per_ue = dict(enumerate(idle_time.tolist()))
+            self.connected_time_per_ue = dict(enumerate(connected_time.tolist()))
+    
+    @classmethod
+    def merged(cls, config, shards, writer=None):
+        """Fusionne les collecteurs des shards [(collecteur, UE_ids globaux)] en un collecteur global
+        (écrit dans le stockage en colonnes writer s'il est fourni)"""
+        merged = cls(config, writer)
+        energy = np.zeros(config.N_UE)
+        idle_time = np.zeros(config.N_UE)
+        connected_time = np.zeros(config.N_UE)
+        # Occupation des buffers : timestamp -> [somme pondérée par le nombre d'UEs, nombre d'UEs]
+        occupancy_ul = defaultdict(lambda: [0.0, 0])
+        occupancy_dl = defaultdict(lambda: [0.0, 0])
+        
+        for shard, ue_ids in shards:
+            # Métriques RNTI
+            merged.rnti_usage.extend(shard.rnti_usage)
+            merged.rnti_failures += shard.rnti_failures
+            for enb_id, max_connected in shard.max_connected_ues.items():
+                merged.max_connected_ues[enb_id] = max(merged.max_connected_ues[enb_id], max_connected)
+            
+            # Métriques par UE, indexées localement dans le shard
+            energy[ue_ids] = list(shard.energy_per_ue.values())
+            idle_time[ue_ids] = list(shard.idle_time_per_ue.values())
+            connected_time[ue_ids] = list(shard.connected_time_per_ue.values())
+            merged.ul_bits_per_ue[ue_ids] += shard.ul_bits_per_ue
+            merged.dl_bits_per_ue[ue_ids] += shard.dl_bits_per_ue
+            merged.ul_active_ttis_per_ue[ue_ids] += shard.ul_active_ttis_per_ue
+            merged.dl_active_ttis_per_ue[ue_ids] += shard.dl_active_ttis_per_ue
+            
+            # Latences
+            merged.idle_to_connected_latency.extend(shard.idle_to_connected_latency)
+            merged.ul_latency.extend(shard.ul_latency)
+            merged.dl_latency.extend(shard.dl_latency)
+            merged.first_packet_latency.extend(shard.first_packet_latency)
+            for enb_id, stats in shard.ul_latency_stats.items():
+                merged.ul_latency_stats[enb_id].merge(stats)
+            for enb_id, stats in shard.dl_latency_stats.items():
+                merged.dl_latency_stats[enb_id].merge(stats)
+            
+            # Débit et paquets
+            merged.ul_bits_per_interval += shard.ul_bits_per_interval
+            merged.dl_bits_per_interval += shard.dl_bits_per_interval
+            merged.ul_packets_sent += shard.ul_packets_sent
+            merged.ul_packets_dropped += shard.ul_packets_dropped
+            merged.dl_packets_sent += shard.dl_packets_sent
+            merged.dl_packets_dropped += shard.dl_packets_dropped
+            
+            for occupancy, shard_occupancy in ((occupancy_ul, shard.buffer_occupancy_ul),
+                                               (occupancy_dl, shard.buffer_occupancy_dl)):
+                for timestamp, avg_occupancy in shard_occupancy:
+                    occupancy[timestamp][0] += avg_occupancy * len(ue_ids)
+                    occupancy[timestamp][1] += len(ue_ids)
+        
+        merged.set_ue_metrics(energy, idle_time, connected_time)
+        merged.rnti_usage.sort()
+        merged.buffer_occupancy_ul = [(t, total / n) for t, (total, n) in sorted(occupancy_ul.items())]
+        merged.buffer_occupancy_dl = [(t, total / n) for t, (total, n) in sorted(occupancy_dl.items())]
+        return merged
     
     def get_results(self):
         """Retourne les résultats de la simulation sous forme de dictionnaire"""
@@ -137,40 +298,66 @@ class MetricsCollector:
                 "std": np.std(self.idle_to_connected_latency) if self.idle_to_connected_latency else 0,
                 "samples": self.idle_to_connected_latency
             },
-            "ul_latency": {
-                "mean": np.mean(self.ul_latency) if self.ul_latency else 0,
-                "std": np.std(self.ul_latency) if self.ul_latency else 0,
-                "percentile_95": np.percentile(self.ul_latency, 95) if self.ul_latency else 0
-            },
-            "dl_latency": {
-                "mean": np.mean(self.dl_latency) if self.dl_latency else 0,
-                "std": np.std(self.dl_latency) if self.dl_latency else 0,
-                "percentile_95": np.percentile(self.dl_latency, 95) if self.dl_latency else 0
-            },
+            "ul_latency": self.summarize_latency(self.ul_latency, self.ul_latency_stats),
+            "dl_latency": self.summarize_latency(self.dl_latency, self.dl_latency_stats),
+            # Statistiques fusionnables par eNB (mode "streaming"), pour l'agrégation entre runs
+            "ul_latency_stats": dict(self.ul_latency_stats),
+            "dl_latency_stats": dict(self.dl_latency_stats),
             
             # Métriques QoS - Débit
-            "ul_throughput": {
-                "mean_per_ue": {ue_id: np.mean(throughputs) if throughputs else 0 
-                              for ue_id, throughputs in self.ul_throughput_per_ue.items()},
-                "global_mean": np.mean([np.mean(t) for t in self.ul_throughput_per_ue.values() if t])
-                              if self.ul_throughput_per_ue else 0
-            },
-            "dl_throughput": {
-                "mean_per_ue": {ue_id: np.mean(throughputs) if throughputs else 0 
-                              for ue_id, throughputs in self.dl_throughput_per_ue.items()},
-                "global_mean": np.mean([np.mean(t) for t in self.dl_throughput_per_ue.values() if t])
-                              if self.dl_throughput_per_ue else 0
-            },
+            "ul_throughput": self.summarize_throughput(self.ul_bits_per_ue, self.ul_active_ttis_per_ue,
+                                                       self.ul_bits_per_interval),
+            "dl_throughput": self.summarize_throughput(self.dl_bits_per_ue, self.dl_active_ttis_per_ue,
+                                                       self.dl_bits_per_interval),
             
             # Packet Delivery Ratio
-            "ul_pdr": (self.ul_packets_sent / (self.ul_packets_sent + self.ul_packets_dropped))
-                      if (self.ul_packets_sent + self.ul_packets_dropped) > 0 else 1.0,
-            "dl_pdr": (self.dl_packets_sent / (self.dl_packets_sent + self.dl_packets_dropped))
-                      if (self.dl_packets_sent + self.dl_packets_dropped) > 0 else 1.0,
+            "ul_pdr": self.delivery_ratio(self.ul_packets_sent, self.ul_packets_dropped),
+            "dl_pdr": self.delivery_ratio(self.dl_packets_sent, self.dl_packets_dropped),
             
             # Buffer occupancy
             "buffer_occupancy_ul": self.buffer_occupancy_ul,
             "buffer_occupancy_dl": self.buffer_occupancy_dl
         }
         
-        return results
\ No newline at end of file
+        return results
+    
+    def write_results(self):
+        """Termine le run dans le stockage en colonnes (tableaux par UE, latences, statistiques par eNB)
+        et retourne ses métriques scalaires, seules gardées en mémoire"""
+        writer = self.writer
+        
+        # Séries accumulées en mémoire avant l'attachement du stockage (ex. fusion des shards)
+        for name in ("rnti_usage", "buffer_occupancy_ul", "buffer_occupancy_dl"):
+            writer.append(name, getattr(self, name))
+            getattr(self, name).clear()
+        
+        # Métriques par UE (énergie et temps par état déjà écrits par set_ue_metrics), indexées par UE_id
+        for name in ("ul_bits_per_ue", "dl_bits_per_ue", "ul_active_ttis_per_ue", "dl_active_ttis_per_ue",
+                     "ul_bits_per_interval", "dl_bits_per_interval"):
+            writer.write(name, getattr(self, name))
+        
+        # Latences : échantillons bruts et statistiques fusionnables par eNB
+        writer.write("idle_to_connected_latency", np.asarray(self.idle_to_connected_latency, dtype=np.float64))
+        writer.write("ul_latency_samples", np.asarray(self.ul_latency, dtype=np.float64))
+        writer.write("dl_latency_samples", np.asarray(self.dl_latency, dtype=np.float64))
+        writer.write_sketches("ul_latency_stats", self.ul_latency_stats)
+        writer.write_sketches("dl_latency_stats", self.dl_latency_stats)
+        
+        scalars = {
+            "rnti_failures": self.rnti_failures,
+            "max_connected_ues": {str(enb_id): count for enb_id, count in self.max_connected_ues.items()},
+            "avg_energy": self.avg_energy,
+            "idle_to_connected_latency": {
+                "mean": np.mean(self.idle_to_connected_latency) if self.idle_to_connected_latency else 0,
+                "std": np.std(self.idle_to_connected_latency) if self.idle_to_connected_latency else 0
+            },
+            "ul_latency": self.summarize_latency(self.ul_latency, self.ul_latency_stats),
+            "dl_latency": self.summarize_latency(self.dl_latency, self.dl_latency_stats),
+            "ul_throughput": {"global_mean": self.global_mean_throughput(self.ul_bits_per_ue, self.ul_active_ttis_per_ue)},
+            "dl_throughput": {"global_mean": self.global_mean_throughput(self.dl_bits_per_ue, self.dl_active_ttis_per_ue)},
+            "ul_pdr": self.delivery_ratio(self.ul_packets_sent, self.ul_packets_dropped),
+            "dl_pdr": self.delivery_ratio(self.dl_packets_sent, self.dl_packets_dropped)
+        }
+        writer.close(scalars)
+        
+        return {**scalars, "results_path": writer.path}
@@ -1,77 +1,126 @@
+import weakref
 import numpy as np
 from simulation.entities import UE, eNodeB
+from simulation.population import UEPopulation
 
 class Network:
     """Gestion du réseau et de sa topologie"""
     
-    def __init__(self, env, config, metrics):
+    def __init__(self, env, config, metrics, rng, enb_positions=None):
         self.env = env
         self.config = config
         self.metrics = metrics
+        self.rng = rng  # Générateur aléatoire propre au run
         self.enbs = []
-        self.ues = []
+        self.enb_by_id = {}  # enb_id -> eNodeB (un shard ne simule qu'une partie des eNBs)
+        self.population = None  # Tableaux d'état des UEs (créés avec les UEs)
+        self.profiles = None
+        
+        # Mode "hybrid" sans processus d'énergie par UE : un UE n'existe en objet que pendant son activité
+        # (période ON, connexion, paging, paquets en attente), sinon il n'est qu'une ligne de la population
+        self.lazy_ues = config.traffic_mode == "hybrid" and config.energy_accounting == "interval"
+        self.ues = weakref.WeakValueDictionary() if self.lazy_ues else {}  # UE_id -> UE existant
+        self.pinned_ues = {}  # UE_id -> UE, UEs dont le buffer UL n'est pas vide (retenus en mémoire)
         
         # Créer la topologie
-        self.create_topology()
+        self.create_topology(enb_positions)
         
         # Processus de collecte périodique de métriques
         self.env.process(self.periodic_metrics_collection())
     
-    def create_topology(self):
-        """Crée et positionne les eNodeBs dans la zone circulaire"""
-        for i in range(self.config.N_eNB):
+    def create_topology(self, enb_positions=None):
+        """Crée et positionne les eNodeBs dans la zone circulaire
+        (ou uniquement ceux de enb_positions {enb_id: position}, déjà tirés)"""
+        if enb_positions is None:
             # Position des eNodeBs selon une distribution Gaussienne 2D
-            distance = np.random.rayleigh(self.config.sigma_eNB)
-            angle = np.random.uniform(0, 2 * np.pi)
-            
-            # Coordonnées cartésiennes
-            x = distance * np.cos(angle)
-            y = distance * np.sin(angle)
-            
-            # Vérifier que l'eNB est dans le cercle de rayon R
-            while np.sqrt(x**2 + y**2) > self.config.R:
-                distance = np.random.rayleigh(self.config.sigma_eNB)
-                angle = np.random.uniform(0, 2 * np.pi)
-                x = distance * np.cos(angle)
-                y = distance * np.sin(angle)
-            
-            position = (x, y)
-            
+            positions = self.sample_positions(self.config.N_eNB, self.config.sigma_eNB)
+            enb_positions = {i: tuple(positions[i].tolist()) for i in range(self.config.N_eNB)}
+        
+        for enb_id, position in enb_positions.items():
             # Créer l'eNodeB
-            enb = eNodeB(i, self.env, self, position, self.config)
+            enb = eNodeB(enb_id, self.env, self, position, self.config, self.rng)
             self.enbs.append(enb)
+            self.enb_by_id[enb_id] = enb
+    
+    def sample_positions(self, n, sigma):
+        """Tire n positions (Gaussienne 2D centrée) dans le cercle de rayon R, par rejet vectorisé"""
+        distance = self.rng.rayleigh(sigma, n)
+        angle = self.rng.uniform(0, 2 * np.pi, n)
+        
+        # Retirer uniquement les points hors du cercle jusqu'à ce qu'ils soient tous acceptés
+        outside = np.flatnonzero(distance > self.config.R)
+        while len(outside) > 0:
+            distance[outside] = self.rng.rayleigh(sigma, len(outside))
+            angle[outside] = self.rng.uniform(0, 2 * np.pi, len(outside))
+            outside = outside[distance[outside] > self.config.R]
+        
+        # Coordonnées cartésiennes
+        return np.column_stack((distance * np.cos(angle), distance * np.sin(angle)))
+    
+    def nearest_enbs(self, positions, chunk_size=100000):
+        """Retourne, pour chaque position, l'indice de l'eNB le plus proche"""
+        enb_positions = np.array([enb.position for enb in self.enbs])
+        nearest = np.empty(len(positions), dtype=np.int32)
+        
+        # Matrice des distances par blocs pour borner la mémoire (chunk_size x N_eNB)
+        for start in range(0, len(positions), chunk_size):
+            block = positions[start:start + chunk_size]
+            squared_distances = ((block[:, np.newaxis, :] - enb_positions[np.newaxis, :, :]) ** 2).sum(axis=2)
+            nearest[start:start + chunk_size] = np.argmin(squared_distances, axis=1)
+        
+        return nearest
     
-    def create_ues(self, profiles):
-        """Crée et positionne les UEs dans la zone circulaire"""
+    def place_ues(self, profiles):
+        """Tire les profils, positions et eNBs servants de tous les UEs (sans créer les UEs)"""
         # Distribution des profils selon les probabilités configurées
         profile_ids = list(range(len(profiles)))
         profile_probs = [self.config.profile_distribution.get(i, 1.0/len(profiles)) for i in profile_ids]
         
-        for i in range(self.config.N_UE):
-            # Assigner un profil
-            profile_idx = np.random.choice(profile_ids, p=profile_probs)
-            profile = profiles[profile_idx]
-            
-            # Position des UEs selon une distribution Gaussienne 2D
-            distance = np.random.rayleigh(self.config.sigma_UE)
-            angle = np.random.uniform(0, 2 * np.pi)
-            
-            # Coordonnées cartésiennes
-            x = distance * np.cos(angle)
-            y = distance * np.sin(angle)
-            
-            # Vérifier que l'UE est dans le cercle de rayon R
-            while np.sqrt(x**2 + y**2) > self.config.R:
-                distance = np.random.rayleigh(self.config.sigma_UE)
-                angle = np.random.uniform(0, 2 * np.pi)
-                x = distance * np.cos(angle)
-                y = distance * np.sin(angle)
-            
-            position = (x, y)
-            
-            # Créer l'UE
-            ue = UE(i, self.env, self, profile, position, self.config)
-            self.ues.append(ue)
+        # Stockage compact de l'état des UEs
+        self.population = UEPopulation(self.config.N_UE, self.config)
+        
+        # Tirages groupés : profils, positions (Gaussienne 2D dans le cercle) et eNB servant
+        self.population.profile_idx[:] = self.rng.choice(profile_ids, size=self.config.N_UE, p=profile_probs)
+        self.population.position[:] = self.sample_positions(self.config.N_UE, self.config.sigma_UE)
+        self.population.serving_enb[:] = self.nearest_enbs(self.population.position)
+    
+    def create_ues(self, profiles, population=None):
+        """Crée et positionne les UEs dans la zone circulaire (ou ceux d'une population déjà placée) ;
+        en mode paresseux, les objets UE ne sont créés qu'à leur premier réveil ou paging"""
+        if population is None:
+            self.place_ues(profiles)
+        else:
+            self.population = population
+        self.profiles = profiles
+        
+        # Rattachement en bloc (UEs déjà positionnés et rattachés dans la population)
+        for enb in self.enbs:
+            enb.register_ues(np.flatnonzero(self.population.serving_enb == enb.id))
+        
+        if not self.lazy_ues:
+            for i in range(self.population.size):
+                self.get_ue(i).start()
+        
+        # Mode "hybrid" : premier réveil de tous les UEs, les réveils suivants sont planifiés par leur eNB
+        if self.config.traffic_mode == "hybrid":
+            self.env.process(self.first_wakeup())
+    
+    def get_ue(self, ue_id):
+        """Retourne l'UE d'identifiant ue_id, créé depuis sa ligne de la population s'il n'existe pas"""
+        ue = self.ues.get(ue_id)
+        if ue is None:
+            ue = UE(ue_id, self.env, self, self.profiles[self.population.profile_idx[ue_id]], None, self.config)
+            self.ues[ue_id] = ue
+        return ue
+    
+    def first_wakeup(self):
+        """Réveille tous les UEs à la fin de la chauffe, après les cycles DL de tous les eNBs et par identifiant
+        croissant : même ordre (donc mêmes tirages aléatoires) qu'avec un processus de trafic par UE (mode "process")"""
+        if self.env.now < self.config.T_warmup:
+            yield self.env.timeout(self.config.T_warmup - self.env.now)
+        
+        for ue_id in range(self.population.size):
+            self.get_ue(ue_id).wake_up()
     
     def periodic_metrics_collection(self):
         """Processus de collecte périodique des métriques"""
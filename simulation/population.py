@@ -0,0 +1,83 @@
+import numpy as np
+
+# Codage des états ECM dans les tableaux de population
+STATE_IDLE = 0
+STATE_CONNECTED = 1
+STATE_NAMES = ("IDLE", "CONNECTED")
+STATE_CODES = {name: code for code, name in enumerate(STATE_NAMES)}
+
+NO_RNTI = 0   # Les RNTIs valides vont de 1 à 2^16
+NO_ENB = -1   # UE non rattaché
+
+
+class UEPopulation:
+    """Stockage compact (structure-of-arrays) de l'état de tous les UEs"""
+    
+    def __init__(self, n_ue, config):
+        self.size = n_ue
+        self.config = config
+        
+        # Topologie et profil
+        self.position = np.zeros((n_ue, 2))
+        self.profile_idx = np.zeros(n_ue, dtype=np.int16)
+        self.serving_enb = np.full(n_ue, NO_ENB, dtype=np.int32)
+        self.cell_slot = np.zeros(n_ue, dtype=np.int32)  # Rang de l'UE dans le registre de son eNB
+        
+        # État ECM et RNTI
+        initial_state = STATE_IDLE if config.ecm_enabled else STATE_CONNECTED
+        self.state = np.full(n_ue, initial_state, dtype=np.int8)
+        self.rnti = np.full(n_ue, NO_RNTI, dtype=np.int32)
+        self.last_activity = np.zeros(n_ue)  # Dernière activité (échéance du timer d'inactivité)
+        
+        # Métriques énergétiques et temps par état
+        self.energy_consumed = np.zeros(n_ue)
+        self.time_in_idle = np.zeros(n_ue)
+        self.time_in_connected = np.zeros(n_ue)
+        self.last_state_change = np.zeros(n_ue)
+        
+        # Compteurs de paquets
+        self.packets_sent = np.zeros(n_ue, dtype=np.int64)
+        self.packets_received = np.zeros(n_ue, dtype=np.int64)
+        self.packets_dropped = np.zeros(n_ue, dtype=np.int64)
+    
+    def select(self, ue_ids, config):
+        """Retourne une nouvelle population réduite aux UEs ue_ids (topologie et profil uniquement)"""
+        subset = UEPopulation(len(ue_ids), config)
+        subset.position[:] = self.position[ue_ids]
+        subset.profile_idx[:] = self.profile_idx[ue_ids]
+        subset.serving_enb[:] = self.serving_enb[ue_ids]
+        return subset
+    
+    def count_in_state(self, state):
+        """Retourne le nombre d'UEs dans l'état ECM donné ("IDLE" ou "CONNECTED")"""
+        return int(np.count_nonzero(self.state == STATE_CODES[state]))
+    
+    def finalize(self, now):
+        """Clôture, pour tous les UEs, l'intervalle d'état en cours à l'instant now"""
+        duration = now - self.last_state_change
+        idle = self.state == STATE_IDLE
+        
+        self.time_in_idle[idle] += duration[idle]
+        self.time_in_connected[~idle] += duration[~idle]
+        
+        # Énergie de base de l'intervalle (mêmes opérations que UE.accumulate_state_interval)
+        if self.config.energy_accounting == "interval":
+            power = np.where(idle, self.config.P_Idle, self.config.P_Connected_Base)
+            self.energy_consumed += power * duration / 1000.0
+        
+        self.last_state_change[:] = now
+
+
+class PopulationField:
+    """Descripteur exposant une colonne de UEPopulation comme attribut d'un UE"""
+    
+    def __init__(self, column):
+        self.column = column
+    
+    def __get__(self, ue, owner=None):
+        if ue is None:
+            return self
+        return getattr(ue.population, self.column)[ue.id].item()
+    
+    def __set__(self, ue, value):
+        getattr(ue.population, self.column)[ue.id] = value
@@ -0,0 +1,158 @@
+import json
+import sys
+import weakref
+from collections import defaultdict
+from time import perf_counter
+import simpy
+from simulation.entities import UE, eNodeB
+
+
+class InstrumentedEnvironment(simpy.Environment):
+    """Environnement SimPy instrumenté : événements et temps réel par type de processus et par eNB,
+    longueur de la file d'événements et vitesse de simulation au cours du temps"""
+    
+    def __init__(self, sample_interval=1.0, initial_time=0):
+        super().__init__(initial_time)
+        self.sample_interval = sample_interval  # Période d'échantillonnage de la file (temps simulé)
+        self.scheduled_events = 0
+        self.processed_events = 0
+        
+        # Événements traités et temps réel d'exécution, par type de processus et par eNB
+        self.events_by_process = defaultdict(int)
+        self.wall_by_process = defaultdict(float)
+        self.events_by_enb = defaultdict(int)
+        self.wall_by_enb = defaultdict(float)
+        
+        # Échantillons (temps simulé, longueur de la file, temps réel écoulé, événements traités)
+        self.samples = []
+        self.next_sample = initial_time
+        self.wall_start = None
+        
+        # Étiquettes (type de processus, eNB) mises en cache par processus
+        self.process_labels = weakref.WeakKeyDictionary()
+    
+    def schedule(self, event, priority=simpy.core.NORMAL, delay=0):
+        self.scheduled_events += 1
+        super().schedule(event, priority, delay)
+    
+    def step(self):
+        if self.wall_start is None:
+            self.wall_start = perf_counter()
+        if self.now >= self.next_sample:
+            self.samples.append((self.now, len(self._queue), perf_counter() - self.wall_start, self.processed_events))
+            self.next_sample = self.now + self.sample_interval
+        
+        if not self._queue:
+            super().step()  # Lève EmptySchedule
+        process_name, enb_id = self.event_label(self._queue[0][3])
+        
+        start = perf_counter()
+        super().step()
+        elapsed = perf_counter() - start
+        
+        self.processed_events += 1
+        self.events_by_process[process_name] += 1
+        self.wall_by_process[process_name] += elapsed
+        self.events_by_enb[enb_id] += 1
+        self.wall_by_enb[enb_id] += elapsed
+    
+    def event_label(self, event):
+        """Retourne (type de processus, eNB) du premier processus que l'événement va reprendre"""
+        process = self.waiting_process(event)
+        if process is not None:
+            label = self.process_labels.get(process)
+            if label is None:
+                label = self.process_label(process)
+                self.process_labels[process] = label
+            return label
+        
+        # Événement sans processus en attente (timeout orphelin, condition déjà déclenchée...)
+        return f"<{type(event).__name__}>", None
+    
+    def waiting_process(self, event):
+        """Retourne le premier processus en attente de l'événement, directement ou à travers les
+        conditions qui l'englobent (timeout | signal : le callback est alors Condition._check)"""
+        for callback in event.callbacks or ():
+            owner = getattr(callback, "__self__", None)
+            if isinstance(owner, simpy.Process):
+                return owner
+            # (une condition a aussi son propre _build_value parmi ses callbacks)
+            if isinstance(owner, simpy.events.Condition) and owner is not event:
+                process = self.waiting_process(owner)
+                if process is not None:
+                    return process
+        return None
+    
+    def process_label(self, process):
+        """Retourne le nom qualifié du générateur d'un processus et l'eNB concerné"""
+        generator = process._generator
+        owner = generator.gi_frame.f_locals.get("self") if generator.gi_frame is not None else None
+        
+        if isinstance(owner, eNodeB):
+            enb_id = owner.id
+        elif isinstance(owner, UE) and owner.serving_enb is not None:
+            enb_id = owner.serving_enb.id
+        else:
+            enb_id = None
+        return generator.__qualname__, enb_id
+    
+    def trace(self):
+        """Retourne la trace d'instrumentation sous forme de dictionnaire sérialisable en JSON"""
+        wall_time = perf_counter() - self.wall_start if self.wall_start is not None else 0.0
+        
+        return {
+            "sim_time": self.now,
+            "wall_time": wall_time,
+            "sim_seconds_per_wall_second": self.now / wall_time if wall_time > 0 else None,
+            "scheduled_events": self.scheduled_events,
+            "processed_events": self.processed_events,
+            "processes": {name: {"events": self.events_by_process[name], "wall_s": self.wall_by_process[name]}
+                          for name in sorted(self.events_by_process, key=self.wall_by_process.get, reverse=True)},
+            "enbs": {str(enb_id): {"events": self.events_by_enb[enb_id], "wall_s": self.wall_by_enb[enb_id]}
+                     for enb_id in self.events_by_enb},
+            "queue_samples": [{"sim_time": now, "queue_length": length, "wall_time": wall, "events": events}
+                              for now, length, wall, events in self.samples]
+        }
+
+
+def save_trace(trace, path):
+    """Écrit une trace d'instrumentation au format JSON"""
+    with open(path, "w") as f:
+        json.dump(trace, f, indent=2)
+
+
+def format_report(trace):
+    """Met en forme une trace d'instrumentation sous forme de rapport texte"""
+    lines = [
+        f"Temps simulé : {trace['sim_time']:.1f} s, temps réel : {trace['wall_time']:.2f} s "
+        f"({trace['sim_seconds_per_wall_second'] or 0:.1f} s simulées par seconde)",
+        f"Événements planifiés : {trace['scheduled_events']}, traités : {trace['processed_events']}",
+        "",
+        f"{'Processus':<40} {'Événements':>12} {'%':>6} {'Temps (s)':>10} {'%':>6}"
+    ]
+    
+    total_events = max(trace["processed_events"], 1)
+    total_wall = max(sum(entry["wall_s"] for entry in trace["processes"].values()), 1e-12)
+    for name, entry in trace["processes"].items():
+        lines.append(f"{name:<40} {entry['events']:>12} {100 * entry['events'] / total_events:>6.1f} "
+                     f"{entry['wall_s']:>10.3f} {100 * entry['wall_s'] / total_wall:>6.1f}")
+    
+    lines += ["", f"{'eNB':<40} {'Événements':>12} {'%':>6} {'Temps (s)':>10} {'%':>6}"]
+    for enb_id, entry in sorted(trace["enbs"].items(), key=lambda item: -item[1]["wall_s"]):
+        name = "(hors eNB)" if enb_id == "None" else enb_id
+        lines.append(f"{name:<40} {entry['events']:>12} {100 * entry['events'] / total_events:>6.1f} "
+                     f"{entry['wall_s']:>10.3f} {100 * entry['wall_s'] / total_wall:>6.1f}")
+    
+    samples = trace["queue_samples"]
+    if samples:
+        lengths = [sample["queue_length"] for sample in samples]
+        lines += ["", f"File d'événements : moyenne {sum(lengths) / len(lengths):.0f}, max {max(lengths)} "
+                      f"({len(samples)} échantillons)"]
+    
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # Usage : python -m simulation.profiling trace.json
+    with open(sys.argv[1]) as f:
+        print(format_report(json.load(f)))
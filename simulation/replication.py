@@ -0,0 +1,122 @@
+import math
+import numbers
+import numpy as np
+from scipy import stats
+
+
+def result_value(results, key):
+    """Retourne la métrique désignée par un chemin pointé (ex. "ul_latency.percentile_99")"""
+    value = results
+    for part in key.split("."):
+        value = value[part]
+    return float(value)
+
+
+def scalar_metrics(results, prefix=""):
+    """Aplatit les métriques scalaires des résultats d'un run en {chemin pointé: valeur}
+    (les séries temporelles et les dictionnaires par UE ou par eNB sont ignorés)"""
+    metrics = {}
+    for name, value in results.items():
+        if not isinstance(name, str):
+            continue
+        if isinstance(value, dict):
+            metrics.update(scalar_metrics(value, f"{prefix}{name}."))
+        elif isinstance(value, numbers.Real) and not isinstance(value, bool):
+            metrics[f"{prefix}{name}"] = float(value)
+    return metrics
+
+
+def confidence_interval(values, confidence):
+    """Retourne (moyenne, demi-largeur) de l'intervalle de confiance de Student sur la moyenne"""
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if n == 0:
+        return 0.0, math.inf
+    mean = values.mean()
+    if n < 2:
+        return mean, math.inf
+    
+    return mean, stats.t.ppf((1 + confidence) / 2, n - 1) * values.std(ddof=1) / math.sqrt(n)
+
+
+def summarize_runs(values, confidence):
+    """Résume une métrique sur les runs d'un scénario (moyenne, écart-type, intervalle de confiance)"""
+    mean, half_width = confidence_interval(values, confidence)
+    return {
+        "mean": mean,
+        "std": np.std(values, ddof=1) if len(values) > 1 else 0.0,
+        "ci_low": mean - half_width,
+        "ci_high": mean + half_width,
+        "n_runs": len(values)
+    }
+
+
+class ReplicationController:
+    """Arrêt séquentiel des réplications d'un scénario : de nouveaux runs sont lancés tant que
+    l'intervalle de confiance d'une métrique suivie dépasse la précision relative visée"""
+    
+    def __init__(self, config):
+        self.metrics = config.replication_metrics     # Chemins pointés dans get_results()
+        self.precision = config.replication_precision  # Demi-largeur relative visée
+        self.confidence = config.replication_confidence
+        self.min_runs = config.N_runs_min
+        self.max_runs = config.N_runs
+        self.in_flight = max(1, config.N_runs_min)  # Runs en cours au plus, au-delà des N_runs_min initiaux
+        
+        self.values = {key: [] for key in self.metrics}
+        self.completed = 0  # Runs réussis
+        self.failed = 0     # Runs en échec
+    
+    def add(self, results):
+        """Enregistre les métriques suivies d'un run terminé"""
+        for key in self.metrics:
+            self.values[key].append(result_value(results, key))
+        self.completed += 1
+    
+    def add_failure(self):
+        """Enregistre un run en échec (il libère sa place parmi les runs en cours)"""
+        self.failed += 1
+    
+    def ready(self, run):
+        """Vrai si le run d'indice run (runs lancés par indice croissant) peut être lancé : les N_runs_min
+        initiaux d'emblée, puis au plus in_flight runs en cours une fois ceux-ci terminés, pour que l'arrêt
+        à convergence écourte le scénario même quand les workers sont plus nombreux que les runs"""
+        done = self.completed + self.failed
+        return run < self.min_runs or (done >= self.min_runs and run < done + self.in_flight)
+    
+    def relative_precision(self, key):
+        """Demi-largeur de l'intervalle de confiance rapportée à la moyenne"""
+        mean, half_width = confidence_interval(self.values[key], self.confidence)
+        if half_width == 0:
+            return 0.0  # Métrique constante sur les runs (ex. aucun échec RNTI)
+        return half_width / abs(mean) if mean != 0 else math.inf
+    
+    def converged(self):
+        """Vrai si toutes les métriques suivies ont atteint la précision visée"""
+        return all(self.relative_precision(key) <= self.precision for key in self.metrics)
+    
+    def finished(self):
+        """Vrai si le scénario n'a plus besoin de runs (précision atteinte ou N_runs réussis)"""
+        if self.completed >= self.max_runs:
+            return True
+        return self.completed >= self.min_runs and self.converged()
+
+
+def run_replications(controllers, make_config, execute):
+    """Lance les runs des scénarios {nom: contrôleur} jusqu'à ce que chacun soit terminé ; make_config(nom, run)
+    construit la configuration d'un run, execute(tâches, skip, ready) les exécute (interface de RunExecutor.run).
+    Les runs possibles (N_runs par scénario, entrelacés par indice) sont soumis d'emblée, mais chaque scénario
+    n'en a que quelques-uns en cours (ReplicationController.ready) ; la convergence est réévaluée à chaque
+    résultat et les runs en attente d'un scénario terminé ne sont pas lancés. Renvoie ((nom, run), résultats, erreur) au fil de l'eau"""
+    max_runs = max((controller.max_runs for controller in controllers.values()), default=0)
+    tasks = [((name, run), make_config(name, run))
+             for run in range(max_runs) for name, controller in controllers.items() if run < controller.max_runs]
+    
+    outcomes = execute(tasks, skip=lambda key: controllers[key[0]].finished(),
+                       ready=lambda key: controllers[key[0]].ready(key[1]))
+    for (name, run), results, error in outcomes:
+        if error is None:
+            controllers[name].add(results)
+        else:
+            controllers[name].add_failure()
+        yield (name, run), results, error
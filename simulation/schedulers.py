@@ -6,7 +6,9 @@ class Scheduler:
     def __init__(self, enb, config):
         self.enb = enb
         self.config = config
-        self.N_RB = config.N_RB
+        # Une fenêtre de scheduling_window TTIs est ordonnancée en un seul appel : N_RB RBs par TTI de la fenêtre
+        self.window = config.scheduling_window
+        self.N_RB = config.N_RB * self.window
     
     def schedule_ul(self, eligible_ues):
         """Alloue les RBs pour les transmissions UL"""
@@ -18,12 +20,11 @@ class Scheduler:
 
 
 class RoundRobinScheduler(Scheduler):
-    """Scheduler Round Robin qui alloue les RBs de manière équitable"""
+    """Scheduler Round Robin qui alloue les RBs de manière équitable
     
-    def __init__(self, enb, config):
-        super().__init__(enb, config)
-        self.ul_pointer = 0  # Indice pour UL Round Robin
-        self.dl_pointer = 0  # Indice pour DL Round Robin
+    Le pointeur Round Robin est porté par les files d'UEs en attente de l'eNB :
+    les UEs servis y repassent en fin de file après chaque TTI.
+    """
     
     def schedule_ul(self, eligible_ues):
         """Alloue les RBs pour les transmissions UL avec Round Robin"""
@@ -37,14 +38,11 @@ class RoundRobinScheduler(Scheduler):
         # Allouer les RBs équitablement, avec au moins 1 RB par UE
         rb_per_ue = max(1, self.N_RB // n_ues)
         
-        # Ordonnancer les UEs à partir du pointeur actuel
+        # Ordonnancer les UEs dans l'ordre de la file de l'eNB (tête = prochain UE à servir)
         scheduled = []
         remaining_rbs = self.N_RB
         
-        for i in range(n_ues):
-            ue_index = (self.ul_pointer + i) % n_ues
-            ue = eligible_ues[ue_index]
-            
+        for ue in eligible_ues:
             # Ne pas allouer plus que le nombre de RBs restants
             alloc_rbs = min(rb_per_ue, remaining_rbs)
             if alloc_rbs > 0:
@@ -54,9 +52,6 @@ class RoundRobinScheduler(Scheduler):
             if remaining_rbs <= 0:
                 break
         
-        # Mettre à jour le pointeur pour le prochain scheduling
-        self.ul_pointer = (self.ul_pointer + len(scheduled)) % n_ues if n_ues > 0 else 0
-        
         return scheduled
     
     def schedule_dl(self, eligible_ues):
@@ -71,14 +66,11 @@ class RoundRobinScheduler(Scheduler):
         # Allouer les RBs équitablement, avec au moins 1 RB par UE
         rb_per_ue = max(1, self.N_RB // n_ues)
         
-        # Ordonnancer les UEs à partir du pointeur actuel
+        # Ordonnancer les UEs dans l'ordre de la file de l'eNB (tête = prochain UE à servir)
         scheduled = []
         remaining_rbs = self.N_RB
         
-        for i in range(n_ues):
-            ue_index = (self.dl_pointer + i) % n_ues
-            ue = eligible_ues[ue_index]
-            
+        for ue in eligible_ues:
             # Ne pas allouer plus que le nombre de RBs restants
             alloc_rbs = min(rb_per_ue, remaining_rbs)
             if alloc_rbs > 0:
@@ -88,9 +80,6 @@ class RoundRobinScheduler(Scheduler):
             if remaining_rbs <= 0:
                 break
         
-        # Mettre à jour le pointeur pour le prochain scheduling
-        self.dl_pointer = (self.dl_pointer + len(scheduled)) % n_ues if n_ues > 0 else 0
-        
         return scheduled
 
 
@@ -99,138 +88,90 @@ class ProportionalFairScheduler(Scheduler):
     
     def __init__(self, enb, config):
         super().__init__(enb, config)
-        self.w_PF = config.w_PF
-        self.ue_history_ul = {}  # UE_id -> historique de débit UL
-        self.ue_history_dl = {}  # UE_id -> historique de débit DL
+        # w_PF est exprimé en TTIs et l'historique n'est mis à jour qu'une fois par fenêtre :
+        # poids ramené en fenêtres pour garder le même horizon de moyenne
+        self.w_PF = max(1, config.w_PF / self.window)
+        # Débit historique UL/DL indexé par slot (rang de l'UE dans le registre de l'eNB)
+        self.history_ul = np.ones(0)
+        self.history_dl = np.ones(0)
     
     def schedule_ul(self, eligible_ues):
         """Alloue les RBs pour les transmissions UL avec Proportional Fair"""
         if not eligible_ues:
             return []
         
-        # Initialiser l'historique pour les nouveaux UEs
-        for ue in eligible_ues:
-            if ue.id not in self.ue_history_ul:
-                self.ue_history_ul[ue.id] = 1.0  # Débit initial non-nul
+        if len(self.history_ul) < len(self.enb.served_ue_ids):
+            self.history_ul = self.grow_history(self.history_ul, len(self.enb.served_ue_ids))
         
-        # Calculer les métriques PF pour chaque UE
-        pf_metrics = []
-        for ue in eligible_ues:
-            # Taille du paquet en tête de file
-            if len(ue.ul_buffer) > 0:
-                instantaneous_rate = ue.ul_buffer[0]['size']
-            else:
-                instantaneous_rate = 0
-            
-            # Calculer la métrique PF
-            if self.ue_history_ul[ue.id] > 0:
-                pf_metric = instantaneous_rate / self.ue_history_ul[ue.id]
-            else:
-                pf_metric = float('inf')  # Priorité maximale si pas d'historique
-            
-            pf_metrics.append((ue, pf_metric))
-        
-        # Trier les UEs par métrique PF décroissante
-        pf_metrics.sort(key=lambda x: x[1], reverse=True)
-        
-        # Allouer les RBs aux UEs selon l'ordre PF
-        scheduled = []
-        remaining_rbs = self.N_RB
-        
-        for ue, _ in pf_metrics:
-            if remaining_rbs > 0:
-                # Allocation simple : min(RBs nécessaires, RBs restants, 1/4 des RBs totaux)
-                needed_rbs = min(4, len(ue.ul_buffer))  # Hypothèse simplifiée
-                alloc_rbs = min(needed_rbs, remaining_rbs, self.N_RB // 4)
-                
-                if alloc_rbs > 0:
-                    scheduled.append((ue, alloc_rbs))
-                    remaining_rbs -= alloc_rbs
-            else:
-                break
-        
-        # Mettre à jour les historiques de débit
-        for ue in eligible_ues:
-            # Trouver si l'UE a été ordonnancé
-            scheduled_ue = next((s_ue for s_ue, _ in scheduled if s_ue.id == ue.id), None)
-            
-            if scheduled_ue:
-                # UE ordonnancé, calculer le débit instantané
-                rb_count = next(rbs for s_ue, rbs in scheduled if s_ue.id == ue.id)
-                instantaneous_rate = rb_count * self.config.R_RB
-            else:
-                # UE non ordonnancé
-                instantaneous_rate = 0
-            
-            # Mettre à jour l'historique avec fenêtre glissante
-            self.ue_history_ul[ue.id] = ((self.w_PF - 1) * self.ue_history_ul[ue.id] + instantaneous_rate) / self.w_PF
-        
-        return scheduled
+        buffers = [ue.ul_buffer for ue in eligible_ues]
+        return self.schedule_pf(eligible_ues, buffers, self.history_ul)
     
     def schedule_dl(self, eligible_ues):
         """Alloue les RBs pour les transmissions DL avec Proportional Fair"""
         if not eligible_ues:
             return []
         
-        # Initialiser l'historique pour les nouveaux UEs
-        for ue in eligible_ues:
-            if ue.id not in self.ue_history_dl:
-                self.ue_history_dl[ue.id] = 1.0  # Débit initial non-nul
-        
-        # Calculer les métriques PF pour chaque UE
-        pf_metrics = []
-        for ue in eligible_ues:
-            # Taille du paquet en tête de file
-            if ue.id in self.enb.dl_buffers and len(self.enb.dl_buffers[ue.id]) > 0:
-                instantaneous_rate = self.enb.dl_buffers[ue.id][0]['size']
-            else:
-                instantaneous_rate = 0
-            
-            # Calculer la métrique PF
-            if self.ue_history_dl[ue.id] > 0:
-                pf_metric = instantaneous_rate / self.ue_history_dl[ue.id]
-            else:
-                pf_metric = float('inf')  # Priorité maximale si pas d'historique
-            
-            pf_metrics.append((ue, pf_metric))
+        if len(self.history_dl) < len(self.enb.served_ue_ids):
+            self.history_dl = self.grow_history(self.history_dl, len(self.enb.served_ue_ids))
         
-        # Trier les UEs par métrique PF décroissante
-        pf_metrics.sort(key=lambda x: x[1], reverse=True)
-        
-        # Allouer les RBs aux UEs selon l'ordre PF
+        buffers = [self.enb.dl_buffers[ue.id] for ue in eligible_ues]
+        return self.schedule_pf(eligible_ues, buffers, self.history_dl)
+    
+    def get_slots(self, eligible_ues):
+        """Retourne les slots (rang dans le registre de l'eNB) des UEs éligibles"""
+        ue_ids = np.fromiter((ue.id for ue in eligible_ues), dtype=np.int64, count=len(eligible_ues))
+        return self.enb.network.population.cell_slot[ue_ids]
+    
+    def grow_history(self, history, size):
+        """Agrandit un tableau d'historique (débit initial non-nul de 1.0 pour les nouveaux slots)"""
+        grown = np.ones(max(size, 2 * len(history)))
+        grown[:len(history)] = history
+        return grown
+    
+    def top_k_order(self, pf_metrics, k):
+        """Retourne les indices des k meilleures métriques par ordre décroissant
+        (à égalité, l'ordre des UEs éligibles est conservé, comme un tri stable complet)"""
+        n = len(pf_metrics)
+        if n <= k:
+            return np.argsort(-pf_metrics, kind="stable")
+        
+        # Sélection partielle : seuil = k-ième plus grande métrique, puis tri des seuls candidats
+        threshold = np.partition(pf_metrics, n - k)[n - k]
+        candidates = np.flatnonzero(pf_metrics >= threshold)
+        return candidates[np.argsort(-pf_metrics[candidates], kind="stable")]
+    
+    def schedule_pf(self, eligible_ues, buffers, history):
+        """Ordonnancement PF commun UL/DL ; met à jour l'historique en place"""
+        slots = self.get_slots(eligible_ues)
+        ue_history = history[slots]
+        
+        # Métrique PF : taille du paquet en tête de file / débit historique
+        head_sizes = np.array([buffer.head_size() for buffer in buffers], dtype=float)
+        if ue_history.min() > 0:
+            pf_metrics = head_sizes / ue_history
+        else:
+            # Priorité maximale (inf) si pas d'historique
+            pf_metrics = np.divide(head_sizes, ue_history, out=np.full(len(slots), np.inf), where=ue_history > 0)
+        
+        # Au plus N_RB UEs peuvent être servis (au moins 1 RB chacun)
         scheduled = []
+        rates = np.zeros(len(eligible_ues))
         remaining_rbs = self.N_RB
         
-        for ue, _ in pf_metrics:
-            if remaining_rbs > 0:
-                # Allocation simple : min(RBs nécessaires, RBs restants, 1/4 des RBs totaux)
-                if ue.id in self.enb.dl_buffers:
-                    needed_rbs = min(4, len(self.enb.dl_buffers[ue.id]))  # Hypothèse simplifiée
-                else:
-                    needed_rbs = 0
-                
-                alloc_rbs = min(needed_rbs, remaining_rbs, self.N_RB // 4)
-                
-                if alloc_rbs > 0:
-                    scheduled.append((ue, alloc_rbs))
-                    remaining_rbs -= alloc_rbs
-            else:
+        for i in self.top_k_order(pf_metrics, self.N_RB).tolist():
+            if remaining_rbs <= 0:
                 break
-        
-        # Mettre à jour les historiques de débit
-        for ue in eligible_ues:
-            # Trouver si l'UE a été ordonnancé
-            scheduled_ue = next((s_ue for s_ue, _ in scheduled if s_ue.id == ue.id), None)
             
-            if scheduled_ue:
-                # UE ordonnancé, calculer le débit instantané
-                rb_count = next(rbs for s_ue, rbs in scheduled if s_ue.id == ue.id)
-                instantaneous_rate = rb_count * self.config.R_RB
-            else:
-                # UE non ordonnancé
-                instantaneous_rate = 0
+            # Allocation simple : min(RBs nécessaires, RBs restants, 1/4 des RBs totaux)
+            needed_rbs = min(4, buffers[i].count) * self.window  # Hypothèse simplifiée (au plus 4 RBs par TTI)
+            alloc_rbs = min(needed_rbs, remaining_rbs, self.N_RB // 4)
             
-            # Mettre à jour l'historique avec fenêtre glissante
-            self.ue_history_dl[ue.id] = ((self.w_PF - 1) * self.ue_history_dl[ue.id] + instantaneous_rate) / self.w_PF
+            if alloc_rbs > 0:
+                scheduled.append((eligible_ues[i], alloc_rbs))
+                remaining_rbs -= alloc_rbs
+                rates[i] = alloc_rbs * self.config.R_RB / self.window  # Débit moyen par TTI de la fenêtre
         
-        return scheduled
\ No newline at end of file
+        # Mise à jour de l'historique (fenêtre glissante) de tous les UEs éligibles en une opération
+        history[slots] = ((self.w_PF - 1) * ue_history + rates) / self.w_PF
+        
+        return scheduled
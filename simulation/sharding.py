@@ -0,0 +1,80 @@
+import copy
+import numpy as np
+import simpy
+from simulation.network import Network
+from simulation.traffic import TrafficProfileGenerator
+from simulation.metrics import MetricsCollector
+from simulation.executor import RunExecutor
+
+
+class CellShard:
+    """Cellule simulée indépendamment : un eNodeB et les UEs qu'il sert"""
+    
+    def __init__(self, enb_id, enb_position, ue_ids, population, profiles, config):
+        self.enb_id = enb_id
+        self.enb_position = enb_position
+        self.ue_ids = ue_ids          # Identifiants globaux des UEs (indice local -> global)
+        self.population = population  # Population réduite aux UEs de la cellule
+        self.profiles = profiles
+        self.config = config          # Configuration du shard (N_UE = nombre d'UEs de la cellule)
+
+
+def simulate_shard(shard):
+    """Point d'entrée d'un worker : simule une cellule et retourne son collecteur de métriques"""
+    config = shard.config
+    env = simpy.Environment()
+    metrics = MetricsCollector(config)
+    
+    # Sous-flux aléatoire propre à la cellule (profils de trafic compris)
+    rng = config.make_rng(stream=shard.enb_id)
+    for profile in shard.profiles:
+        profile.use_rng(rng)
+    
+    network = Network(env, config, metrics, rng, enb_positions={shard.enb_id: shard.enb_position})
+    network.create_ues(shard.profiles, shard.population)
+    
+    env.run(until=config.T_warmup + config.T_sim)
+    
+    metrics.collect_final_ue_metrics(network)
+    return metrics
+
+
+def make_shards(config):
+    """Tire la topologie complète une seule fois et la découpe en une cellule par eNodeB"""
+    rng = config.make_rng()
+    
+    # Environnement jamais exécuté : sert uniquement à construire la topologie
+    network = Network(simpy.Environment(), config, None, rng)
+    profiles = TrafficProfileGenerator(config, rng).generate_profiles()
+    network.place_ues(profiles)
+    
+    shards = []
+    for enb in network.enbs:
+        ue_ids = np.flatnonzero(network.population.serving_enb == enb.id)
+        
+        shard_config = copy.copy(config)
+        shard_config.N_UE = len(ue_ids)
+        population = network.population.select(ue_ids, shard_config)
+        
+        shards.append(CellShard(enb.id, enb.position, ue_ids, population, profiles, shard_config))
+    
+    return shards
+
+
+def run_sharded_simulation(config, max_workers=None, writer=None):
+    """Simule chaque cellule dans son propre processus et fusionne leurs métriques, écrites dans
+    writer s'il est fourni (valable uniquement sans mobilité : les cellules ne partagent alors aucun état)"""
+    if config.mobility_model != "Static":
+        raise ValueError(f"Le mode \"sharded\" suppose une mobilité statique (mobility_model={config.mobility_model!r})")
+    
+    shards = make_shards(config)
+    ue_ids = {shard.enb_id: shard.ue_ids for shard in shards}
+    
+    shard_metrics = []
+    executor = RunExecutor(simulate_shard, max_workers=max_workers)
+    for enb_id, metrics, error in executor.run([(shard.enb_id, shard) for shard in shards]):
+        if error is not None:
+            raise RuntimeError(f"Simulation de la cellule {enb_id} en échec: {error!r}") from error
+        shard_metrics.append((metrics, ue_ids[enb_id]))
+    
+    return MetricsCollector.merged(config, shard_metrics, writer)
@@ -0,0 +1,106 @@
+import math
+import numpy as np
+
+
+class StreamingStats:
+    """Statistiques en mémoire bornée : moyenne/variance glissantes (Welford) et
+    histogramme à classes logarithmiques pour les quantiles, fusionnables"""
+    
+    def __init__(self, min_value=1e-6, max_value=1e6, relative_accuracy=0.01):
+        self.min_value = min_value
+        self.max_value = max_value
+        self.relative_accuracy = relative_accuracy
+        
+        # Moyenne et variance glissantes
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        
+        # Classe i >= 1 : [min_value * gamma^(i-1), min_value * gamma^i[ ; classe 0 : < min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.n_bins = int(math.ceil(math.log(max_value / min_value) / self.log_gamma)) + 1
+        self.counts = np.zeros(self.n_bins + 1, dtype=np.int64)
+    
+    def bin_index(self, value):
+        """Retourne l'indice de la classe contenant value"""
+        if value < self.min_value:
+            return 0
+        index = int(math.log(value / self.min_value) / self.log_gamma) + 1
+        return min(index, self.n_bins)
+    
+    def bin_value(self, index):
+        """Retourne la valeur représentative d'une classe (erreur relative <= relative_accuracy)"""
+        if index == 0:
+            return 0.0
+        return self.min_value * self.gamma ** (index - 1) * 2 * self.gamma / (self.gamma + 1)
+    
+    def add(self, value):
+        """Ajoute une observation"""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.counts[self.bin_index(value)] += 1
+    
+    def merge(self, other):
+        """Fusionne other dans ces statistiques (autre eNB, autre run)"""
+        if (other.min_value, other.max_value, other.relative_accuracy) != \
+                (self.min_value, self.max_value, self.relative_accuracy):
+            raise ValueError("Impossible de fusionner des histogrammes de paramètres différents")
+        if other.count == 0:
+            return self
+        
+        # Combinaison des moyennes et variances (Chan et al.)
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.counts += other.counts
+        return self
+    
+    @classmethod
+    def merged(cls, stats_list):
+        """Retourne la fusion d'une liste de statistiques (non modifiées)"""
+        stats_list = list(stats_list)
+        if not stats_list:
+            return cls()
+        
+        first = stats_list[0]
+        merged = cls(first.min_value, first.max_value, first.relative_accuracy)
+        for stats in stats_list:
+            merged.merge(stats)
+        return merged
+    
+    @property
+    def std(self):
+        """Écart-type (population, comme np.std)"""
+        return math.sqrt(self.m2 / self.count) if self.count > 0 else 0.0
+    
+    def quantile(self, q):
+        """Retourne le quantile q (0 <= q <= 1), à la précision relative de l'histogramme"""
+        if self.count == 0:
+            return 0
+        rank = max(1, int(math.ceil(q * self.count)))
+        index = int(np.searchsorted(np.cumsum(self.counts), rank))
+        # Les extrêmes observés bornent la valeur représentative de la classe
+        return min(max(self.bin_value(index), self.min), self.max)
+    
+    def summary(self):
+        """Retourne moyenne, écart-type et percentiles usuels"""
+        return {
+            "mean": self.mean if self.count > 0 else 0,
+            "std": self.std,
+            "percentile_50": self.quantile(0.50),
+            "percentile_95": self.quantile(0.95),
+            "percentile_99": self.quantile(0.99),
+            "percentile_99_9": self.quantile(0.999),
+            "count": self.count
+        }
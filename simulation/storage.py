@@ -0,0 +1,171 @@
+import json
+import os
+import numpy as np
+from simulation.sketches import StreamingStats
+
+MANIFEST = "manifest.json"
+
+
+def run_path(config):
+    """Répertoire d'un run dans le stockage en colonnes"""
+    return os.path.join(config.results_dir, config.run_name or f"seed_{config.random_seed}")
+
+
+def run_writer(config):
+    """Crée l'écriture d'un run dans son répertoire, marquée par l'empreinte de sa configuration"""
+    return RunWriter(run_path(config), config.config_hash())
+
+
+class ColumnWriter:
+    """Colonne écrite par ajouts successifs dans un fichier binaire brut (lignes de forme fixe)"""
+    
+    def __init__(self, path, dtype, row_shape=()):
+        self.file = open(path, "wb")
+        self.filename = os.path.basename(path)
+        self.dtype = np.dtype(dtype)
+        self.row_shape = tuple(row_shape)
+        self.rows = 0
+    
+    def append(self, rows):
+        """Ajoute des lignes à la fin du fichier"""
+        rows = np.asarray(rows, dtype=self.dtype).reshape((-1,) + self.row_shape)
+        rows.tofile(self.file)
+        self.rows += len(rows)
+    
+    def close(self):
+        """Ferme le fichier et retourne la description de la colonne pour le manifeste"""
+        self.file.close()
+        return {"file": self.filename, "dtype": self.dtype.str, "shape": [self.rows, *self.row_shape]}
+
+
+class RunWriter:
+    """Écriture d'un run dans le stockage en colonnes : un fichier binaire par colonne et un manifeste JSON
+    (types, dimensions, métriques scalaires) ; les séries temporelles sont écrites au fil du run"""
+    
+    def __init__(self, path, config_hash=None):
+        os.makedirs(path, exist_ok=True)
+        
+        # Répertoire réutilisé : l'ancien manifeste décrirait des colonnes tronquées jusqu'à la fin du run
+        try:
+            os.remove(os.path.join(path, MANIFEST))
+        except FileNotFoundError:
+            pass
+        
+        self.path = path
+        self.config_hash = config_hash  # Identifie la configuration dont le répertoire contient le run
+        self.columns = {}   # nom -> ColumnWriter
+        self.sketches = {}  # nom -> paramètres des histogrammes
+    
+    def add_column(self, name, dtype=np.float64, row_shape=()):
+        """Déclare une colonne (écrite même si elle reste vide)"""
+        if name not in self.columns:
+            self.columns[name] = ColumnWriter(os.path.join(self.path, f"{name}.bin"), dtype, row_shape)
+        return self.columns[name]
+    
+    def append(self, name, rows):
+        """Ajoute des lignes à une colonne déclarée"""
+        self.columns[name].append(rows)
+    
+    def write(self, name, array):
+        """Écrit une colonne complète (tableau par UE, par intervalle...)"""
+        array = np.asarray(array)
+        self.add_column(name, array.dtype, array.shape[1:]).append(array)
+    
+    def write_sketches(self, name, stats_per_enb):
+        """Écrit des statistiques fusionnables par eNB : identifiants, moments et histogrammes"""
+        enb_ids = list(stats_per_enb)
+        stats_list = [stats_per_enb[enb_id] for enb_id in enb_ids]
+        first = stats_list[0] if stats_list else StreamingStats()
+        n_bins = len(first.counts)
+        
+        self.write(f"{name}.enb_id", np.array([-1 if enb_id is None else enb_id for enb_id in enb_ids],
+                                              dtype=np.int64))
+        self.write(f"{name}.moments", np.array([(s.count, s.mean, s.m2, s.min, s.max) for s in stats_list],
+                                               dtype=np.float64).reshape(-1, 5))
+        self.write(f"{name}.counts", np.array([s.counts for s in stats_list], dtype=np.int64).reshape(-1, n_bins))
+        self.sketches[name] = {"min_value": first.min_value, "max_value": first.max_value,
+                               "relative_accuracy": first.relative_accuracy}
+    
+    def close(self, scalars):
+        """Ferme les colonnes et écrit le manifeste (le run n'est lisible qu'une fois le manifeste écrit)"""
+        manifest = {
+            "config_hash": self.config_hash,
+            "columns": {name: column.close() for name, column in self.columns.items()},
+            "sketches": self.sketches,
+            "scalars": scalars
+        }
+        # Écriture atomique : un manifeste présent est toujours complet
+        path = os.path.join(self.path, MANIFEST)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(manifest, f, indent=2, default=float)
+        os.replace(temp_path, path)
+
+
+class StoredRun:
+    """Run lu depuis le stockage en colonnes. S'utilise comme les résultats de get_results :
+    les métriques scalaires viennent du manifeste, les colonnes sont projetées en mémoire (np.memmap)"""
+    
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, MANIFEST)) as f:
+            manifest = json.load(f)
+        self.config_hash = manifest.get("config_hash")
+        self.columns = manifest["columns"]
+        self.sketch_params = manifest["sketches"]
+        self.scalars = manifest["scalars"]
+    
+    def column(self, name):
+        """Retourne une colonne en lecture seule, sans la charger en mémoire"""
+        info = self.columns[name]
+        shape = tuple(info["shape"])
+        if shape[0] == 0:
+            return np.empty(shape, dtype=info["dtype"])  # np.memmap refuse les fichiers vides
+        return np.memmap(os.path.join(self.path, info["file"]), dtype=info["dtype"], mode="r", shape=shape)
+    
+    def sketches(self, name):
+        """Reconstruit les statistiques fusionnables par eNB (eNB -1 : non renseigné)"""
+        params = self.sketch_params[name]
+        stats_per_enb = {}
+        for enb_id, moments, counts in zip(self.column(f"{name}.enb_id"), self.column(f"{name}.moments"),
+                                           self.column(f"{name}.counts")):
+            stats = StreamingStats(**params)
+            count, stats.mean, stats.m2, stats.min, stats.max = moments.tolist()
+            stats.count = int(count)
+            stats.counts = np.array(counts)
+            stats_per_enb[None if enb_id == -1 else int(enb_id)] = stats
+        return stats_per_enb
+    
+    def __getitem__(self, name):
+        if name in self.scalars:
+            return self.scalars[name]
+        if name in self.sketch_params:
+            return self.sketches(name)
+        return self.column(name)
+    
+    def __contains__(self, name):
+        return name in self.scalars or name in self.sketch_params or name in self.columns
+    
+    def get(self, name, default=None):
+        return self[name] if name in self else default
+
+
+class ResultStore:
+    """Répertoire de runs stockés en colonnes : un sous-répertoire par run, regroupés par scénario"""
+    
+    def __init__(self, results_dir):
+        self.results_dir = results_dir
+    
+    def runs(self, scenario=None):
+        """Runs terminés (manifeste présent), d'un scénario ou de tous"""
+        root = os.path.join(self.results_dir, scenario) if scenario else self.results_dir
+        for directory, _, files in sorted(os.walk(root)):
+            if MANIFEST in files:
+                yield StoredRun(directory)
+    
+    def scenario_runs(self):
+        """Retourne {scénario: [runs]} pour les scénarios stockés (premier niveau de results_dir)"""
+        if not os.path.isdir(self.results_dir):
+            return {}
+        return {scenario: list(self.runs(scenario)) for scenario in sorted(os.listdir(self.results_dir))
+                if os.path.isdir(os.path.join(self.results_dir, scenario))}
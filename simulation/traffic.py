@@ -1,51 +1,88 @@
+import json
 import numpy as np
 
+class VariateStream:
+    """Variables aléatoires scalaires servies depuis des blocs pré-générés
+    (un seul appel NumPy par bloc au lieu d'un par tirage)"""
+    
+    def __init__(self, draw_block, block_size=4096):
+        self.draw_block = draw_block  # Fonction taille -> tableau de tirages standardisés
+        self.block_size = block_size
+        self.block = []
+        self.position = 0
+    
+    def next(self):
+        """Retourne le prochain tirage, en générant un nouveau bloc si nécessaire"""
+        if self.position == len(self.block):
+            self.block = self.draw_block(self.block_size).tolist()
+            self.position = 0
+        value = self.block[self.position]
+        self.position += 1
+        return value
+
+
+def load_profile_table(config):
+    """Retourne la table déclarative des profils {profile_id: {"ranges", "default"}},
+    lue depuis config.profile_table_file (JSON) si renseigné, sinon config.profile_table"""
+    if config.profile_table_file is None:
+        return config.profile_table
+    
+    with open(config.profile_table_file) as f:
+        table = json.load(f)
+    # Clés JSON : identifiants de profils sous forme de chaînes
+    return {int(profile_id): spec for profile_id, spec in table.items()}
+
+
+def generate_activity_pattern(spec, config, rng):
+    """Génère les N_intervals niveaux d'activité d'un profil en opérations vectorielles :
+    niveau de base + gigue uniforme, selon la première plage horaire [début, fin[ contenant l'intervalle"""
+    n = config.N_intervals
+    hours = (np.arange(n) * config.dt_global // 3600) % 24  # Heure correspondant à chaque intervalle
+    
+    if spec is None:
+        base, jitter = config.profile_default_level
+        return base + jitter * rng.random(n)
+    
+    base_level, jitter_level = spec["default"]
+    base = np.full(n, float(base_level))
+    jitter = np.full(n, float(jitter_level))
+    
+    # Plages appliquées de la dernière à la première : la première plage correspondante l'emporte
+    for start, end, range_base, range_jitter in reversed(spec["ranges"]):
+        if start <= end:
+            in_range = (hours >= start) & (hours < end)
+        else:
+            in_range = (hours >= start) | (hours < end)  # Plage passant minuit (ex. 22h-6h)
+        base[in_range] = range_base
+        jitter[in_range] = range_jitter
+    
+    return base + jitter * rng.random(n)
+
+
 class TrafficProfile:
     """Définition d'un profil de trafic sur 24h"""
     
-    def __init__(self, profile_id, config):
+    def __init__(self, profile_id, config, rng, activity_levels=None):
         self.id = profile_id
         self.config = config
+        self.use_rng(rng)
         
-        # Générer les niveaux d'activité pour les 288 intervalles (5 minutes sur 24h)
-        self.activity_levels = self.generate_activity_pattern()
+        # Niveaux d'activité des N_intervals intervalles (ligne de la matrice des profils si fournie)
+        if activity_levels is None:
+            activity_levels = self.generate_activity_pattern()
+        self.activity_levels = activity_levels
+    
+    def use_rng(self, rng):
+        """Associe le générateur aléatoire du run (ou d'un shard) et réinitialise les flux de tirages"""
+        self.rng = rng
+        # Tirages standardisés mis à l'échelle à chaque appel : loi normale (tailles) et exponentielle (inter-arrivées)
+        self.normal_stream = VariateStream(rng.standard_normal)
+        self.exponential_stream = VariateStream(rng.standard_exponential)
     
     def generate_activity_pattern(self):
-        """Génère les niveaux d'activité pour chaque intervalle de 5 minutes"""
-        activity_levels = np.zeros(self.config.N_intervals)
-        
-        # Exemple de génération selon le profil
-        if self.id == 0:  # Profil "Travailleur bureau"
-            # Plus actif pendant les heures de bureau (8h-18h)
-            for i in range(self.config.N_intervals):
-                hour = (i * 5) // 60  # Heure correspondant à l'intervalle
-                if 8 <= hour < 12 or 14 <= hour < 18:
-                    activity_levels[i] = 0.7 + 0.2 * np.random.random()
-                elif 12 <= hour < 14:  # Pause déjeuner
-                    activity_levels[i] = 0.4 + 0.3 * np.random.random()
-                elif hour >= 22 or hour < 6:  # Nuit
-                    activity_levels[i] = 0.05 + 0.1 * np.random.random()
-                else:
-                    activity_levels[i] = 0.2 + 0.3 * np.random.random()
-        
-        elif self.id == 1:  # Profil "Utilisateur nocturne"
-            # Plus actif le soir et la nuit
-            for i in range(self.config.N_intervals):
-                hour = (i * 5) // 60
-                if 19 <= hour < 2:
-                    activity_levels[i] = 0.6 + 0.3 * np.random.random()
-                elif 2 <= hour < 8:  # Sommeil
-                    activity_levels[i] = 0.05 + 0.1 * np.random.random()
-                else:
-                    activity_levels[i] = 0.2 + 0.3 * np.random.random()
-                    
-        # ... Autres profils (2-9) ...
-        
-        else:  # Profil par défaut avec activité moyenne
-            for i in range(self.config.N_intervals):
-                activity_levels[i] = 0.3 + 0.4 * np.random.random()
-        
-        return activity_levels
+        """Génère les niveaux d'activité de chaque intervalle global selon la table des profils"""
+        spec = load_profile_table(self.config).get(self.id)
+        return generate_activity_pattern(spec, self.config, self.rng)
     
     def get_activity_level(self, interval_index):
         """Retourne le niveau d'activité pour un intervalle donné"""
@@ -67,19 +104,24 @@ class TrafficProfile:
         """Retourne la taille d'un paquet UL basée sur le niveau d'activité"""
         # Taille moyenne de paquet entre 200 et 1000 bits selon l'activité
         mean_size = 200 + 800 * activity_level
-        return int(np.random.normal(mean_size, mean_size * 0.2))
+        return int(mean_size + mean_size * 0.2 * self.normal_stream.next())
     
     def get_dl_packet_size(self, activity_level):
         """Retourne la taille d'un paquet DL basée sur le niveau d'activité"""
+        mean_size, std_size = self.get_dl_packet_size_params(activity_level)
+        return int(mean_size + std_size * self.normal_stream.next())
+    
+    def get_dl_packet_size_params(self, activity_level):
+        """Retourne (moyenne, écart-type) de la taille des paquets DL pour un niveau d'activité"""
         # Paquets DL généralement plus grands que UL
         mean_size = 500 + 2000 * activity_level
-        return int(np.random.normal(mean_size, mean_size * 0.2))
+        return mean_size, mean_size * 0.2
     
     def get_ul_inter_arrival(self, activity_level):
         """Retourne le temps entre deux paquets UL consécutifs"""
         # Plus le niveau d'activité est élevé, plus les paquets arrivent fréquemment
         mean_time = 2.0 * (1.0 - 0.7 * activity_level)
-        return max(0.1, np.random.exponential(mean_time))
+        return max(0.1, mean_time * self.exponential_stream.next())
     
     def get_dl_probability(self, activity_level):
         """Retourne la probabilité de générer un paquet DL à chaque cycle"""
@@ -90,15 +132,27 @@ class TrafficProfile:
 class TrafficProfileGenerator:
     """Génère les différents profils de trafic pour la simulation"""
     
-    def __init__(self, config):
+    def __init__(self, config, rng):
         self.config = config
+        self.rng = rng
     
     def generate_profiles(self):
         """Crée les K profils de trafic définis"""
+        self.activity_matrix = self.generate_activity_matrix()
         profiles = []
         
         for k in range(self.config.K):
-            profile = TrafficProfile(k, self.config)
+            profile = TrafficProfile(k, self.config, self.rng, self.activity_matrix[k])
             profiles.append(profile)
         
-        return profiles
\ No newline at end of file
+        return profiles
+    
+    def generate_activity_matrix(self):
+        """Génère les niveaux d'activité de tous les profils : matrice (K, N_intervals)"""
+        table = load_profile_table(self.config)
+        activity_matrix = np.empty((self.config.K, self.config.N_intervals))
+        
+        for k in range(self.config.K):
+            activity_matrix[k] = generate_activity_pattern(table.get(k), self.config, self.rng)
+        
+        return activity_matrix
\ No newline at end of file
@@ -87,4 +87,27 @@ class ResultVisualizer:
         width = 0.35
         
         plt.bar(x - width/2, ul_latencies, width, label='Latence UL moyenne')
-        plt.bar
\ No newline at end of file
+        plt.bar
+    
+    def plot_energy_distribution(self, scenario_runs, bins=50):
+        """Trace la distribution de l'énergie par UE de chaque scénario à partir des runs stockés en colonnes
+        ({scénario: [StoredRun]}) : histogrammes cumulés run par run, colonnes lues par projection mémoire"""
+        plt.figure(figsize=(10, 6))
+        
+        upper = max((float(run["energy_per_ue"].max()) for runs in scenario_runs.values() for run in runs
+                     if len(run["energy_per_ue"]) > 0), default=1.0)
+        edges = np.linspace(0, upper, bins + 1)
+        
+        for scenario_name, runs in scenario_runs.items():
+            counts = np.zeros(bins)
+            for run in runs:
+                counts += np.histogram(run["energy_per_ue"], bins=edges)[0]
+            plt.stairs(counts / max(counts.sum(), 1), edges, label=f"Scénario {scenario_name}")
+        
+        plt.xlabel("Énergie par UE (J)")
+        plt.ylabel("Proportion des UEs")
+        plt.title("Distribution de l'énergie consommée par UE")
+        plt.legend()
+        plt.grid(True)
+        plt.savefig("results/energy_distribution.png", dpi=300, bbox_inches="tight")
+        plt.close()
@@ -0,0 +1,59 @@
+"""File de paquets à tampon circulaire (PacketQueue)"""
+import pytest
+from simulation.buffers import PacketQueue
+
+
+def test_fifo_order_across_wrap_around():
+    """La tête fait le tour du tampon sans perdre l'ordre FIFO"""
+    queue = PacketQueue(8)
+    for i in range(4):
+        queue.push(100 + i, float(i))
+    assert len(queue.sizes) == 4
+    
+    # Tête avancée puis ajouts qui reviennent au début du tampon (sans agrandissement)
+    assert queue.pop() == (100, 0.0)
+    assert queue.pop() == (101, 1.0)
+    queue.push(104, 4.0)
+    queue.push(105, 5.0)
+    assert len(queue.sizes) == 4
+    assert queue.head == 2
+    
+    assert [queue.pop() for _ in range(4)] == [(102, 2.0), (103, 3.0), (104, 4.0), (105, 5.0)]
+    assert len(queue) == 0 and not queue
+    assert queue.backlog_bits == 0
+
+
+def test_growth_keeps_order_when_wrapped():
+    """Agrandissement par doublement d'un tampon dont la tête n'est pas en position 0"""
+    queue = PacketQueue(100)
+    for i in range(4):
+        queue.push(i, float(i))
+    queue.pop()
+    queue.pop()
+    for i in range(4, 10):
+        queue.push(i, float(i))
+    
+    assert len(queue.sizes) == 8
+    assert queue.head_size() == 2
+    assert queue.backlog_bits == sum(range(2, 10))
+    assert [queue.pop()[0] for _ in range(len(queue))] == list(range(2, 10))
+
+
+def test_growth_is_bounded_by_capacity():
+    """Le tampon ne dépasse pas la capacité ; au-delà, les paquets sont refusés"""
+    queue = PacketQueue(6)
+    assert all(queue.push(i, 0.0) for i in range(6))
+    assert len(queue.sizes) == 6
+    assert queue.is_full()
+    assert not queue.push(6, 0.0)
+    assert len(queue) == 6
+    
+    queue.pop()
+    assert queue.push(6, 0.0)
+    assert [queue.pop()[0] for _ in range(6)] == [1, 2, 3, 4, 5, 6]
+
+
+def test_pop_on_empty_queue_raises():
+    queue = PacketQueue(4)
+    with pytest.raises(IndexError):
+        queue.pop()
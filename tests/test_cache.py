@@ -0,0 +1,100 @@
+"""Cache des résultats adressé par l'empreinte de la configuration (config_hash, ResultCache)"""
+import json
+import os
+import pytest
+from simulation.cache import ResultCache
+from simulation.config import SimulationConfig, UNHASHED_PARAMETERS
+from simulation.storage import RunWriter
+
+
+def make_config(**overrides):
+    config = SimulationConfig()
+    for name, value in overrides.items():
+        setattr(config, name, value)
+    return config
+
+
+@pytest.mark.parametrize("name, value", [("random_seed", 7), ("N_UE", 1000), ("scheduler_algo", "PF"),
+                                         ("T_inactivity_C_I", 5.0), ("traffic_mode", "process")])
+def test_changed_parameter_gives_a_new_key(name, value):
+    assert make_config(**{name: value}).config_hash() != make_config().config_hash()
+
+
+def test_profile_table_file_contents_are_hashed(tmp_path):
+    path = tmp_path / "profiles.json"
+    path.write_text(json.dumps([{"name": "A"}]))
+    config = make_config(profile_table_file=str(path))
+    key = config.config_hash()
+    assert key != make_config().config_hash()
+    
+    # Même nom de fichier, contenu modifié
+    path.write_text(json.dumps([{"name": "B"}]))
+    assert config.config_hash() != key
+
+
+# Valeurs modifiées des paramètres d'orchestration (sans effet sur les résultats d'un run)
+ORCHESTRATION_CHANGES = {
+    "N_runs": 50, "N_runs_min": 5, "replication_control": "sequential", "replication_metrics": ("avg_energy",),
+    "replication_precision": 0.01, "replication_confidence": 0.99, "warmup_sharing": "fork",
+    "run_name": "B2/run_007", "results_dir": "elsewhere", "instrumentation_file": "trace.json",
+    "result_cache": "on", "result_cache_dir": "elsewhere/cache", "result_cache_max_bytes": 1024
+}
+
+
+def test_every_orchestration_parameter_is_covered():
+    assert set(ORCHESTRATION_CHANGES) == set(UNHASHED_PARAMETERS)
+
+
+@pytest.mark.parametrize("name, value", ORCHESTRATION_CHANGES.items())
+def test_orchestration_parameters_do_not_change_the_key(name, value):
+    assert make_config(**{name: value}).config_hash() == make_config().config_hash()
+
+
+def test_run_directory_is_part_of_a_columnar_key():
+    """En mode "columnar", les résultats désignent le répertoire du run : son nom compte"""
+    config = make_config(results_store="columnar", run_name="A1/run_000")
+    assert make_config(results_store="columnar", run_name="A1/run_001").config_hash() != config.config_hash()
+    assert make_config(run_name="A1/run_001").config_hash() == make_config(run_name="A1/run_000").config_hash()
+
+
+def put_entry(cache, key, size, used_at):
+    """Entrée de taille connue, dernière utilisation à used_at"""
+    cache.put(key, {"payload": b"x" * size})
+    os.utime(cache.path(key), (used_at, used_at))
+    return os.path.getsize(cache.path(key))
+
+
+def test_lru_eviction_respects_max_bytes(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=10 ** 9)
+    entry_size = max(put_entry(cache, key, 1000, used_at) for key, used_at in (("aa1", 100), ("bb2", 200),
+                                                                                ("cc3", 300)))
+    cache.max_bytes = 3 * entry_size
+    
+    # "aa1" utilisée en dernier : "bb2" devient la moins récemment utilisée
+    assert cache.get("aa1") is not None
+    cache.put("dd4", {"payload": b"x" * 1000})
+    
+    assert cache.get("bb2") is None
+    assert all(cache.get(key) is not None for key in ("aa1", "cc3", "dd4"))
+    assert sum(size for _, size, _ in cache.entries()) <= cache.max_bytes
+
+
+def write_run(path, config_hash):
+    writer = RunWriter(path, config_hash)
+    writer.write("energy_per_ue", [1.0, 2.0])
+    writer.close({"avg_energy": 1.5})
+
+
+def test_overwritten_columnar_entry_is_a_miss(tmp_path):
+    """Entrée d'un run stocké en colonnes dont le répertoire a été réécrit par une autre configuration"""
+    cache = ResultCache(str(tmp_path / "cache"), max_bytes=10 ** 9)
+    path = str(tmp_path / "results" / "A1" / "run_000")
+    write_run(path, "key1")
+    cache.put("key1", {"avg_energy": 1.5, "results_path": path})
+    assert cache.get("key1") == {"avg_energy": 1.5, "results_path": path}
+    
+    # Réécriture en cours (manifeste retiré), puis terminée avec une autre empreinte
+    writer = RunWriter(path, "key2")
+    assert cache.get("key1") is None
+    writer.close({"avg_energy": 3.0})
+    assert cache.get("key1") is None
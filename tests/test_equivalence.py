@@ -0,0 +1,73 @@
+"""Équivalence des modes d'exécution : pour une même configuration, les modes qui ne sont que des
+optimisations doivent produire les mêmes métriques scalaires"""
+import numpy as np
+import pytest
+from main import run_simulation
+from simulation.config import SimulationConfig
+from simulation.branching import run_with_shared_warmup
+from simulation.schedulers import ProportionalFairScheduler
+from simulation.replication import scalar_metrics
+
+
+def make_config(**overrides):
+    """Configuration courte : 3 cellules, 60 UEs"""
+    config = SimulationConfig()
+    config.N_eNB = 3
+    config.N_UE = 60
+    config.T_warmup = 10
+    config.T_sim = 60
+    for name, value in overrides.items():
+        setattr(config, name, value)
+    return config
+
+
+def run_metrics(**overrides):
+    """Métriques scalaires d'un run (résultats en mémoire, sans cache)"""
+    return scalar_metrics(run_simulation(make_config(**overrides)))
+
+
+@pytest.mark.parametrize("scheduler_algo", ["RR", "PF"])
+def test_tick_matches_event(scheduler_algo):
+    """Ordonnancement réveillé à chaque TTI ou seulement sur arrivée de données
+    (avec ECM : sans ECM, aucun UE n'obtient de RNTI et rien n'est ordonnancé)"""
+    tick = run_metrics(scheduling_mode="tick", scheduler_algo=scheduler_algo)
+    event = run_metrics(scheduling_mode="event", scheduler_algo=scheduler_algo)
+    assert tick["ul_throughput.global_mean"] > 0 and tick["dl_throughput.global_mean"] > 0
+    assert tick == event
+
+
+@pytest.mark.parametrize("energy_accounting, N_UE, random_seed",
+                         [("interval", 60, 42), ("periodic", 60, 42), ("interval", 120, 42), ("interval", 90, 7)])
+def test_hybrid_matches_process(energy_accounting, N_UE, random_seed):
+    """UEs en OFF réveillés par leur eNB (UEs créés à la demande en mode "interval") ou un processus par UE :
+    mêmes réveils dans le même ordre, donc mêmes tirages aléatoires"""
+    overrides = dict(energy_accounting=energy_accounting, N_UE=N_UE, random_seed=random_seed)
+    hybrid = run_metrics(traffic_mode="hybrid", **overrides)
+    process = run_metrics(traffic_mode="process", **overrides)
+    assert hybrid == process
+
+
+@pytest.mark.parametrize("k", [1, 4, 25, 100, 500])
+def test_pf_top_k_order_matches_full_sort(k):
+    """Sélection partielle des k meilleures métriques PF : même ordre qu'un tri stable complet"""
+    scheduler = ProportionalFairScheduler(None, make_config(scheduler_algo="PF"))
+    rng = np.random.default_rng(k)
+    pf_metrics = rng.integers(0, 50, size=300).astype(float)  # Nombreuses égalités
+    pf_metrics[rng.integers(0, 300, size=10)] = np.inf        # UEs sans historique
+    
+    order = scheduler.top_k_order(pf_metrics, k)
+    full = np.argsort(-pf_metrics, kind="stable")
+    assert len(order) >= min(k, len(pf_metrics))
+    assert order.tolist() == full[:len(order)].tolist()
+
+
+def test_fork_branches_match_direct_runs():
+    """Scénarios dérivés par fork d'une chauffe commune ou simulés de bout en bout"""
+    tasks = [(algo, make_config(scheduler_algo=algo)) for algo in ("RR", "PF")]
+    direct = {algo: scalar_metrics(run_simulation(config)) for algo, config in tasks}
+    
+    branched = {}
+    for algo, results, error in run_with_shared_warmup(tasks, max_workers=2):
+        assert error is None
+        branched[algo] = scalar_metrics(results)
+    assert branched == direct
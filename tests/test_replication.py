@@ -0,0 +1,45 @@
+"""Arrêt séquentiel des réplications (ReplicationController) avec une fonction de run factice"""
+from simulation.config import SimulationConfig
+from simulation.executor import RunExecutor
+from simulation.replication import ReplicationController, run_replications
+
+
+def make_controller(**overrides):
+    config = SimulationConfig()
+    config.N_runs = 10
+    config.N_runs_min = 3
+    config.replication_metrics = ("avg_energy",)
+    for name, value in overrides.items():
+        setattr(config, name, value)
+    return ReplicationController(config)
+
+
+def stub_run(config):
+    """Run factice : métrique constante pour le scénario "constant", très dispersée sinon"""
+    name, run = config
+    return {"avg_energy": 1.0 if name == "constant" else 10.0 ** (run % 3)}
+
+
+def test_ready_bounds_runs_in_flight():
+    """N_runs_min runs d'emblée, puis au plus N_runs_min en cours une fois ceux-ci terminés"""
+    controller = make_controller()
+    assert [controller.ready(run) for run in range(5)] == [True, True, True, False, False]
+    
+    controller.add({"avg_energy": 1.0})
+    controller.add({"avg_energy": 10.0})
+    assert not controller.ready(3)
+    
+    controller.add_failure()
+    assert [controller.ready(run) for run in range(3, 7)] == [True, True, True, False]
+
+
+def test_converged_scenario_stops_with_many_workers():
+    """Plus de workers que de runs : le scénario convergé s'arrête à N_runs_min, l'autre va jusqu'à N_runs"""
+    controllers = {"constant": make_controller(), "noisy": make_controller()}
+    executor = RunExecutor(stub_run, max_workers=64)
+    outcomes = list(run_replications(controllers, lambda name, run: (name, run), executor.run))
+    
+    assert all(error is None for _, _, error in outcomes)
+    runs = {name: sorted(run for (key, run), _, _ in outcomes if key == name) for name in controllers}
+    assert runs == {"constant": [0, 1, 2], "noisy": list(range(10))}
+    assert controllers["constant"].finished() and not controllers["noisy"].converged()
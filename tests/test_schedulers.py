@@ -0,0 +1,124 @@
+"""Fenêtres d'ordonnancement de plusieurs TTIs (scheduling_window) : paramètres des schedulers,
+allocation PF et estimation des instants de départ dans la fenêtre"""
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from simulation.buffers import PacketQueue
+from simulation.config import SimulationConfig
+from simulation.entities import eNodeB
+from simulation.schedulers import RoundRobinScheduler, ProportionalFairScheduler
+from tests.test_equivalence import run_metrics
+
+
+def make_config(scheduling_window):
+    config = SimulationConfig()
+    config.scheduling_window = scheduling_window
+    return config
+
+
+def make_enb(config, n_ues):
+    """eNB réduit à ce qu'utilise le scheduler PF : registre des UEs servis et buffers DL"""
+    population = SimpleNamespace(cell_slot=np.arange(n_ues))
+    return SimpleNamespace(served_ue_ids=np.arange(n_ues), network=SimpleNamespace(population=population),
+                           dl_buffers={}, config=config)
+
+
+def make_ue(enb, ue_id, n_packets, size=100):
+    """UE servi par enb avec n_packets paquets DL en attente"""
+    buffer = enb.dl_buffers[ue_id] = PacketQueue(enb.config.B_size)
+    for _ in range(n_packets):
+        buffer.push(size, 0.0)
+    return SimpleNamespace(id=ue_id)
+
+
+class WindowedENB:
+    """Méthodes de fenêtre de l'eNB, appliquées à une horloge et une configuration fixées"""
+    window_ttis = eNodeB.window_ttis
+    estimate_departure = eNodeB.estimate_departure
+    
+    def __init__(self, scheduling_window, now):
+        self.config = make_config(scheduling_window)
+        self.env = SimpleNamespace(now=now)
+
+
+@pytest.mark.parametrize("scheduler_class", [RoundRobinScheduler, ProportionalFairScheduler])
+@pytest.mark.parametrize("scheduling_window", [1, 10])
+def test_rb_budget_covers_the_window(scheduler_class, scheduling_window):
+    config = make_config(scheduling_window)
+    scheduler = scheduler_class(None, config)
+    assert scheduler.N_RB == config.N_RB * scheduling_window
+
+
+@pytest.mark.parametrize("scheduling_window, w_PF", [(1, 100), (10, 10), (50, 2), (200, 1)])
+def test_pf_averaging_horizon_stays_in_ttis(scheduling_window, w_PF):
+    """Historique mis à jour une fois par fenêtre : poids w_PF ramené en fenêtres (au moins 1)"""
+    scheduler = ProportionalFairScheduler(None, make_config(scheduling_window))
+    assert scheduler.w_PF == w_PF
+
+
+@pytest.mark.parametrize("scheduling_window", [1, 5, 10])
+def test_pf_allocation_scales_with_the_window(scheduling_window):
+    """Sur une fenêtre de N TTIs, un UE reçoit N fois les RBs d'un TTI, pour le même débit moyen par TTI"""
+    config = make_config(scheduling_window)
+    enb = make_enb(config, n_ues=3)
+    scheduler = ProportionalFairScheduler(enb, config)
+    ues = [make_ue(enb, ue_id, n_packets) for ue_id, n_packets in enumerate((10, 2, 0))]
+    
+    scheduled = scheduler.schedule_dl(ues[:2])
+    assert [(ue.id, rbs) for ue, rbs in scheduled] == [(0, 4 * scheduling_window), (1, 2 * scheduling_window)]
+    
+    # Débit moyen par TTI de la fenêtre, moyenné sur w_PF / N fenêtres
+    w_PF = config.w_PF / scheduling_window
+    expected = [((w_PF - 1) + rbs / scheduling_window * config.R_RB) / w_PF for rbs in (4 * scheduling_window,
+                                                                                          2 * scheduling_window)]
+    assert scheduler.history_dl[:2] == pytest.approx(expected)
+    assert scheduler.history_dl[2] == 1.0
+
+
+def test_pf_per_ue_cap_is_a_quarter_of_the_window_budget():
+    config = make_config(10)
+    config.N_RB = 8
+    enb = make_enb(config, n_ues=1)
+    scheduler = ProportionalFairScheduler(enb, config)
+    [(_, rbs)] = scheduler.schedule_dl([make_ue(enb, 0, n_packets=10)])
+    assert rbs == config.N_RB * 10 // 4
+
+
+def test_window_ttis_counts_the_occupied_ttis():
+    enb = WindowedENB(10, now=1.0)
+    assert enb.window_ttis(0, 1000) == 1
+    assert enb.window_ttis(10, 1000) == 1
+    assert enb.window_ttis(350, 1000) == 4
+    assert enb.window_ttis(1000, 1000) == 10
+    assert WindowedENB(1, now=1.0).window_ttis(1000, 1000) == 1
+
+
+def test_departure_within_the_window():
+    """Départ au dernier TTI occupé par les bits déjà servis, jamais avant le premier TTI suivant la création"""
+    enb = WindowedENB(10, now=1.0)
+    assert enb.estimate_departure(0.5, 500, 1000) == pytest.approx(0.995)
+    assert enb.estimate_departure(0.5, 1000, 1000) == pytest.approx(1.0)
+    assert enb.estimate_departure(0.9975, 500, 1000) == pytest.approx(0.998)
+    assert enb.estimate_departure(0.9999, 100, 1000) == pytest.approx(1.0)
+    
+    created_at = np.random.default_rng(0).uniform(0.99, 1.0, size=200)
+    departures = [enb.estimate_departure(t, 100, 1000) for t in created_at.tolist()]
+    assert all(t <= departure <= 1.0 for t, departure in zip(created_at.tolist(), departures))
+    
+    assert WindowedENB(1, now=1.0).estimate_departure(0.5, 500, 1000) == 1.0
+
+
+@pytest.mark.parametrize("scheduler_algo", ["RR", "PF"])
+def test_light_load_run_matches_per_tti_scheduling(scheduler_algo):
+    """Charge faible (capacité jamais saturée, et R_RB assez grand pour qu'un paquet tienne dans l'allocation
+    PF d'un TTI) : mêmes débits et taux de livraison qu'avec un ordonnancement par TTI, latences moyennes
+    à moins d'une fenêtre près"""
+    overrides = dict(scheduler_algo=scheduler_algo, N_UE=30, T_sim=20, R_RB=5000)
+    per_tti = run_metrics(**overrides)
+    windowed = run_metrics(scheduling_window=10, **overrides)
+    assert per_tti["ul_throughput.global_mean"] > 0 and per_tti["dl_throughput.global_mean"] > 0
+    
+    for name in ("ul_throughput.global_mean", "dl_throughput.global_mean", "ul_pdr", "dl_pdr"):
+        assert windowed[name] == pytest.approx(per_tti[name], rel=1e-9)
+    for name in ("ul_latency.mean", "dl_latency.mean"):
+        assert abs(windowed[name] - per_tti[name]) < 10 * make_config(10).dt_local
@@ -0,0 +1,67 @@
+"""Statistiques en mémoire bornée (StreamingStats) : quantiles et fusion"""
+import math
+import numpy as np
+import pytest
+from simulation.sketches import StreamingStats
+
+
+def make_stats(values, **params):
+    stats = StreamingStats(**params)
+    for value in values:
+        stats.add(value)
+    return stats
+
+
+@pytest.mark.parametrize("relative_accuracy", [0.01, 0.05])
+def test_quantiles_within_relative_accuracy(relative_accuracy):
+    """Quantile à la précision relative de l'histogramme (rang ceil(q * n), comme "inverted_cdf")"""
+    values = np.random.default_rng(0).lognormal(mean=-5, sigma=2, size=20000)
+    stats = make_stats(values, relative_accuracy=relative_accuracy)
+    
+    for q in (0.01, 0.5, 0.95, 0.99, 0.999):
+        exact = np.quantile(values, q, method="inverted_cdf")
+        assert stats.quantile(q) == pytest.approx(exact, rel=relative_accuracy)
+
+
+def test_quantiles_bounded_by_observed_extremes():
+    """La valeur représentative d'une classe est ramenée entre les extrêmes observés"""
+    stats = make_stats([0.25, 0.5, 0.75])
+    assert all(0.25 <= stats.quantile(q) <= 0.75 for q in (0.0, 0.5, 1.0))
+    assert make_stats([0.3] * 5).quantile(0.99) == 0.3
+
+
+def test_moments_match_numpy():
+    values = np.random.default_rng(1).exponential(0.01, size=5000)
+    stats = make_stats(values)
+    assert stats.count == len(values)
+    assert stats.mean == pytest.approx(values.mean(), rel=1e-12)
+    assert stats.std == pytest.approx(values.std(), rel=1e-9)
+    assert (stats.min, stats.max) == (values.min(), values.max())
+
+
+def test_merge_equals_single_stream():
+    """Fusion de statistiques partielles (eNBs, shards) = statistiques du flux complet"""
+    values = np.random.default_rng(2).gamma(2.0, 0.005, size=9000)
+    parts = np.array_split(values, [1000, 5500])
+    merged = StreamingStats.merged(make_stats(part) for part in parts)
+    combined = make_stats(values)
+    
+    assert merged.count == combined.count
+    assert np.array_equal(merged.counts, combined.counts)
+    assert (merged.min, merged.max) == (combined.min, combined.max)
+    assert merged.mean == pytest.approx(combined.mean, rel=1e-12)
+    assert merged.std == pytest.approx(combined.std, rel=1e-9)
+    for q in (0.5, 0.99):
+        assert merged.quantile(q) == combined.quantile(q)
+
+
+def test_merge_with_empty_stats():
+    stats = make_stats([0.1, 0.2])
+    assert StreamingStats.merged([StreamingStats(), stats]).summary() == stats.summary()
+    assert StreamingStats.merged([]).summary()["count"] == 0
+    assert math.isinf(StreamingStats().min)
+
+
+def test_merge_rejects_different_parameters():
+    with pytest.raises(ValueError):
+        StreamingStats(relative_accuracy=0.01).merge(StreamingStats(relative_accuracy=0.02))
@@ -0,0 +1,37 @@
+"""Stockage en colonnes (RunWriter, StoredRun, ResultStore)"""
+import os
+import numpy as np
+from simulation.storage import MANIFEST, RunWriter, StoredRun, ResultStore
+
+
+def write_run(path, energy, config_hash="a"):
+    writer = RunWriter(path, config_hash)
+    writer.write("energy_per_ue", energy)
+    writer.close({"avg_energy": float(np.mean(energy))})
+
+
+def test_written_run_reads_back(tmp_path):
+    write_run(tmp_path / "A1" / "run_000", np.arange(4.0))
+    run = StoredRun(tmp_path / "A1" / "run_000")
+    assert run.config_hash == "a"
+    assert run["avg_energy"] == 1.5
+    assert np.array_equal(run["energy_per_ue"], np.arange(4.0))
+    assert not any(name.endswith(".tmp") for name in os.listdir(tmp_path / "A1" / "run_000"))
+
+
+def test_rewritten_run_is_unreadable_until_closed(tmp_path):
+    """Un run réécrit dans le même répertoire n'est plus listé tant que son nouveau manifeste n'est pas écrit"""
+    path = tmp_path / "A1" / "run_000"
+    write_run(path, np.arange(1000.0))
+    
+    # Nouveau run interrompu : colonnes tronquées, pas de manifeste
+    writer = RunWriter(path, "b")
+    writer.add_column("energy_per_ue").append([1.0])
+    writer.columns["energy_per_ue"].file.flush()
+    assert not (path / MANIFEST).exists()
+    assert list(ResultStore(tmp_path).runs()) == []
+    
+    writer.close({"avg_energy": 1.0})
+    [run] = ResultStore(tmp_path).runs()
+    assert run.config_hash == "b"
+    assert np.array_equal(run["energy_per_ue"], [1.0])